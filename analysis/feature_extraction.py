@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import argparse
+from random import Random
+from multiprocessing import Pool
+
+import numpy as np
+
+# Make the simulation modules importable regardless of the current working directory
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '../simulation_basis'))
+
+from scopa_state import (GameState, random_policy, primiera_from_mask, CARDS, FULL_DECK_MASK, DIAMONDS_MASK,
+                         SETTE_BELLO_MASK, MOVE_CARD_BITS, MOVE_CARD_MASK, COLLECT_PILE_FLAG)
+
+
+
+# Layout of a feature row - three 40-bit card masks unpacked one card per column, followed by the pile stats.
+# Everything is seen from the point of view of the player about to move ('own' / 'opp').
+MASK_COLUMNS = ['hand', 'board', 'seen']
+STAT_COLUMNS = [
+    'own_pile_size', 'opp_pile_size',
+    'own_pile_diamonds', 'opp_pile_diamonds',
+    'own_sette_bello', 'opp_sette_bello',
+    'own_primiera', 'opp_primiera',
+    'own_suits_covered', 'opp_suits_covered',
+    'own_scopas', 'opp_scopas',
+    'deck_remaining', 'opp_hand_size', 'player'
+]
+FEATURE_WIDTH = len(MASK_COLUMNS) * len(CARDS) + len(STAT_COLUMNS)
+
+# Layout of an action row - the card played, the kind of move and the captured cards as a 40-bit mask
+ACTION_KINDS = ['discard', 'capture', 'collect_pile']
+ACTION_COLUMNS = ['card_played', 'kind']
+ACTION_WIDTH = len(ACTION_COLUMNS) + len(CARDS)
+
+DEFAULT_SHARD_ROWS = 1_000_000
+
+_bit_positions = np.arange(len(CARDS), dtype=np.uint64)
+
+
+def _unpack_masks(masks):
+    """(n,) list of 40-bit ints -> (n, 40) uint8 array with one column per card."""
+    packed = np.array(masks, dtype=np.uint64)
+    return ((packed[:, None] >> _bit_positions) & np.uint64(1)).astype(np.uint8)
+
+
+def decision_point(state):
+    """Integer features of the position the current player is facing, in 'STAT_COLUMNS' order after the three masks."""
+    own, opp = state.current, 1 - state.current
+    own_pile, opp_pile = state.piles[own], state.piles[opp]
+
+    deck_mask = 0
+    for i in state.deck_order[state.deck_pos:]:
+        deck_mask |= 1 << i
+    # everything that is neither in the opponent's hand nor still in the deck has been seen by the current player
+    seen = FULL_DECK_MASK & ~(state.hands[opp] | deck_mask)
+
+    own_primiera, own_suits = primiera_from_mask(own_pile)
+    opp_primiera, opp_suits = primiera_from_mask(opp_pile)
+
+    return (
+        state.hands[own], state.board, seen,
+        own_pile.bit_count(), opp_pile.bit_count(),
+        (own_pile & DIAMONDS_MASK).bit_count(), (opp_pile & DIAMONDS_MASK).bit_count(),
+        int(bool(own_pile & SETTE_BELLO_MASK)), int(bool(opp_pile & SETTE_BELLO_MASK)),
+        own_primiera, opp_primiera,
+        own_suits, opp_suits,
+        state.scopas[own], state.scopas[opp],
+        len(CARDS) - state.deck_pos, state.hands[opp].bit_count(), own
+    )
+
+
+def move_kind(move):
+    if move & COLLECT_PILE_FLAG:
+        return ACTION_KINDS.index('collect_pile')
+    return ACTION_KINDS.index('capture') if move >> MOVE_CARD_BITS else ACTION_KINDS.index('discard')
+
+
+
+class ShardWriter:
+    """
+    Streams decision points into fixed-size shards of '.npy' arrays, which can be opened later with
+    'np.load(path, mmap_mode="r")' without reading them into memory.
+
+    Every shard is made of three files sharing the same row order:
+        <prefix>_<n>_features.npy  uint8 (rows, FEATURE_WIDTH)
+        <prefix>_<n>_actions.npy   uint8 (rows, ACTION_WIDTH)
+        <prefix>_<n>_labels.npy    int8  (rows,) - final score difference for the player who moved
+    """
+
+    def __init__(self, out_dir, prefix='shard', shard_rows=DEFAULT_SHARD_ROWS):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.shard_rows = shard_rows
+        self.shards = []
+        self.rows_written = 0
+        self._positions = []
+        self._moves = []
+        self._labels = []
+
+    def add_game(self, positions, moves, labels):
+        self._positions += positions
+        self._moves += moves
+        self._labels += labels
+        if len(self._labels) >= self.shard_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._labels:
+            return
+
+        positions = self._positions
+        features = np.empty((len(positions), FEATURE_WIDTH), dtype=np.uint8)
+        for column, name in enumerate(MASK_COLUMNS):
+            start = column * len(CARDS)
+            features[:, start:start + len(CARDS)] = _unpack_masks([p[column] for p in positions])
+        features[:, len(MASK_COLUMNS) * len(CARDS):] = np.array([p[len(MASK_COLUMNS):] for p in positions], dtype=np.uint8)
+
+        actions = np.empty((len(self._moves), ACTION_WIDTH), dtype=np.uint8)
+        actions[:, 0] = [move & MOVE_CARD_MASK for move in self._moves]
+        actions[:, 1] = [move_kind(move) for move in self._moves]
+        actions[:, len(ACTION_COLUMNS):] = _unpack_masks([(move >> MOVE_CARD_BITS) & FULL_DECK_MASK for move in self._moves])
+
+        labels = np.array(self._labels, dtype=np.int8)
+
+        name = f'{self.prefix}_{len(self.shards):05d}'
+        for suffix, array in (('features', features), ('actions', actions), ('labels', labels)):
+            np.save(os.path.join(self.out_dir, f'{name}_{suffix}.npy'), array)
+
+        self.shards.append({'name': name, 'rows': len(labels)})
+        self.rows_written += len(labels)
+        self._positions, self._moves, self._labels = [], [], []
+
+
+
+def extract_game(state, writer, policy=random_policy, rng=None):
+    """Plays 'state' to the end, handing every decision point over to 'writer' once the final scores are known."""
+    rng = rng or Random()
+    positions = []
+    moves = []
+    players = []
+    while not state.is_over():
+        positions.append(decision_point(state))
+        players.append(state.current)
+        move = policy(state, state.legal_moves(), rng)
+        moves.append(move)
+        state.apply(move)
+
+    player_1_score, player_2_score = state.scores()
+    difference = player_1_score - player_2_score
+    writer.add_game(positions, moves, [difference if player == 0 else -difference for player in players])
+
+
+def _extract_range(task):
+    out_dir, prefix, first_game, games, seed, shard_rows = task
+    writer = ShardWriter(out_dir, prefix=prefix, shard_rows=shard_rows)
+    for game_id in range(first_game, first_game + games):
+        state, rng = GameState.seeded(seed, game_id)
+        extract_game(state, writer, rng=rng)
+    writer.flush()
+    return writer.shards
+
+
+def generate_dataset(out_dir, games, seed=0, workers=None, shard_rows=DEFAULT_SHARD_ROWS):
+    """
+    Simulation + feature extraction stage: simulates 'games' games across a process pool and writes the decision points
+    straight to sharded arrays, without going through the JSON game logs. Returns the manifest written to 'out_dir'.
+    """
+    workers = workers or os.cpu_count() or 1
+    per_worker = -(-games // workers)
+    tasks = []
+    for worker in range(workers):
+        first_game = worker * per_worker
+        count = min(per_worker, games - first_game)
+        if count > 0:
+            tasks.append((out_dir, f'shard_w{worker:03d}', first_game, count, seed, shard_rows))
+
+    shards = []
+    if tasks:
+        with Pool(len(tasks)) as pool:
+            shards = [shard for result in pool.map(_extract_range, tasks) for shard in result]
+    else:
+        os.makedirs(out_dir, exist_ok=True)  # no games - still leave an (empty) dataset behind
+
+    manifest = {
+        'games': games,
+        'seed': seed,
+        'rows': sum(shard['rows'] for shard in shards),
+        'feature_columns': [f'{name}_{card.key()}' for name in MASK_COLUMNS for card in CARDS] + STAT_COLUMNS,
+        'action_columns': ACTION_COLUMNS + [f'captured_{card.key()}' for card in CARDS],
+        'action_kinds': ACTION_KINDS,
+        'shards': shards
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+def load_shards(out_dir):
+    """Yields (features, actions, labels) memory-mapped views of every shard listed in the manifest of 'out_dir'."""
+    with open(os.path.join(out_dir, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+    for shard in manifest['shards']:
+        yield tuple(np.load(os.path.join(out_dir, f"{shard['name']}_{suffix}.npy"), mmap_mode='r')
+                    for suffix in ('features', 'actions', 'labels'))
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulate Scopa games and write ML-ready feature shards.')
+    parser.add_argument('--games', type=int, default=1000, help='Number of games to simulate')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the simulated games')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the CPU count)')
+    parser.add_argument('--shard_rows', type=int, default=DEFAULT_SHARD_ROWS, help='Rows per shard (shards are cut at game boundaries)')
+    parser.add_argument('--out_dir', type=str, default=os.path.join(script_dir, '../features/'), help='Output directory')
+    args = parser.parse_args()
+
+    manifest = generate_dataset(args.out_dir, args.games, seed=args.seed, workers=args.workers, shard_rows=args.shard_rows)
+    print(f"Wrote {manifest['rows']} rows in {len(manifest['shards'])} shards to {args.out_dir}")
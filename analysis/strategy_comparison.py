@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import argparse
+from random import Random
+from itertools import combinations
+from statistics import NormalDist, fmean, variance
+
+# Make the simulation modules importable regardless of the current working directory
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '../simulation_basis'))
+
+from scopa_state import GameState, CARDS, CARD_INDEX, CARD_VALUES, game_rng
+from scopa_w_logging import Card
+from batch_simulation import POLICIES, check_policies
+
+
+
+# Estimators of the edge of policy A over policy B (mean of A's score minus B's score in a game). Every estimator plays
+# 'units' independent sampling units; what a unit is made of is what sets them apart:
+#   independent -> two games on unrelated deals, A sitting as player 1 in the first and as player 2 in the second
+#   crn         -> common random numbers: the same deal (and move seed) played twice, with the seats swapped
+#   antithetic  -> 'crn' on a deal and on its antithetic deal, where the two players get each other's hands
+#   stratified  -> 'crn' units, sampled proportionally within strata of the deals (see STRATA)
+METHODS = ['independent', 'crn', 'antithetic', 'stratified']
+
+SETTE_BELLO = CARD_INDEX[Card('7', 'diamonds')]
+BOARD_CARDS = 4
+HAND_CARDS = 3
+
+
+def _settebello_strata():
+    # where the sette bello is dealt: on the initial board, in a first hand, or later from the deck
+    positions = {'board': range(0, 4), 'first_hand_p1': range(4, 7), 'first_hand_p2': range(7, 10), 'deck': range(10, len(CARDS))}
+    return {name: len(places) / len(CARDS) for name, places in positions.items()}, positions
+
+
+def _board_sum_bucket(board_sum):
+    if board_sum <= 14:
+        return 'board_sum_<=14'
+    if board_sum <= 20:
+        return 'board_sum_15-20'
+    if board_sum <= 26:
+        return 'board_sum_21-26'
+    return 'board_sum_>=27'
+
+
+def _board_sum_strata():
+    # exact probability of every bucket, from all the possible initial boards
+    counts = {}
+    for board in combinations(CARD_VALUES, BOARD_CARDS):
+        bucket = _board_sum_bucket(sum(board))
+        counts[bucket] = counts.get(bucket, 0) + 1
+    total = sum(counts.values())
+    return {bucket: count / total for bucket, count in sorted(counts.items())}
+
+
+def _deal_in_settebello_stratum(stratum, rng):
+    order = [i for i in range(len(CARDS)) if i != SETTE_BELLO]
+    rng.shuffle(order)
+    order.insert(rng.choice(_settebello_strata()[1][stratum]), SETTE_BELLO)
+    return order
+
+
+def _deal_in_board_sum_stratum(stratum, rng):
+    # rejection sampling on the initial board only - every bucket holds a sizeable share of the boards
+    while True:
+        order = list(range(len(CARDS)))
+        rng.shuffle(order)
+        if _board_sum_bucket(sum(CARD_VALUES[i] for i in order[:BOARD_CARDS])) == stratum:
+            return order
+
+
+STRATA = {
+    'settebello': (lambda: _settebello_strata()[0], _deal_in_settebello_stratum),
+    'board_sum': (_board_sum_strata, _deal_in_board_sum_stratum),
+}
+
+
+def antithetic_deal(order):
+    """Same deal, with the two players getting each other's hands in every round."""
+    swapped = list(order[:BOARD_CARDS])
+    for start in range(BOARD_CARDS, len(order), 2 * HAND_CARDS):
+        swapped += order[start + HAND_CARDS:start + 2 * HAND_CARDS] + order[start:start + HAND_CARDS]
+    return swapped
+
+
+def _random_deal(rng):
+    order = list(range(len(CARDS)))
+    rng.shuffle(order)
+    return order
+
+
+def play_deal(order, move_seed, policies):
+    """Plays one game on the deal 'order', returning (player 1 score, player 2 score)."""
+    state = GameState(order)
+    rng = Random(move_seed)
+    while not state.is_over():
+        state.apply(policies[state.current](state, state.legal_moves(), rng))
+    return state.scores()
+
+
+def _edge(order, move_seed, policy_a, policy_b, a_seat):
+    if a_seat == 0:
+        score_a, score_b = play_deal(order, move_seed, (policy_a, policy_b))
+    else:
+        score_b, score_a = play_deal(order, move_seed, (policy_b, policy_a))
+    return score_a - score_b
+
+
+def _unit(method, rng, policy_a, policy_b, order=None):
+    """Edges of A over B for every game of one sampling unit, always in the same game order."""
+    if method == 'independent':
+        return [_edge(_random_deal(rng), rng.getrandbits(64), policy_a, policy_b, seat) for seat in (0, 1)]
+
+    order = order or _random_deal(rng)
+    move_seed = rng.getrandbits(64)
+    edges = [_edge(order, move_seed, policy_a, policy_b, seat) for seat in (0, 1)]
+    if method == 'antithetic':
+        mirrored = antithetic_deal(order)
+        edges += [_edge(mirrored, move_seed, policy_a, policy_b, seat) for seat in (0, 1)]
+    return edges
+
+
+def _naive_unit_variance(units):
+    # variance that the mean of a unit would have if its games were played on independent deals
+    games_per_unit = len(units[0])
+    return sum(variance([unit[j] for unit in units]) for j in range(games_per_unit)) / games_per_unit ** 2
+
+
+
+def compare_strategies(policy_a, policy_b, units=1000, seed=0, method='crn', strata='settebello', confidence=0.95):
+    """
+    Estimates the edge of 'policy_a' over 'policy_b' (both names from 'POLICIES') with one of 'METHODS'.
+
+    Along with the estimate and its confidence interval, returns the variance reduction with respect to playing the same
+    number of games on independent deals, and the corresponding effective number of independent games.
+    """
+    assert method in METHODS, f"unknown method '{method}' (available: {', '.join(METHODS)})"
+    assert units > 1, "at least two units are needed to estimate a variance"
+    check_policies([policy_a, policy_b])
+    policies = POLICIES[policy_a], POLICIES[policy_b]
+
+    if method == 'stratified':
+        assert strata in STRATA, f"unknown strata '{strata}' (available: {', '.join(STRATA)})"
+        probabilities_of, deal_in_stratum = STRATA[strata]
+        probabilities = probabilities_of()
+
+        by_stratum = {}
+        unit_id = 0
+        for stratum, probability in probabilities.items():
+            # proportional allocation, with at least two units per stratum to estimate its variance
+            by_stratum[stratum] = []
+            for _ in range(max(2, round(units * probability))):
+                rng = game_rng(seed, unit_id)
+                unit_id += 1
+                by_stratum[stratum].append(_unit('crn', rng, *policies, order=deal_in_stratum(stratum, rng)))
+
+        all_units = [unit for stratum_units in by_stratum.values() for unit in stratum_units]
+        mean = sum(probabilities[s] * fmean(fmean(u) for u in us) for s, us in by_stratum.items())
+        variance_of_mean = sum(probabilities[s] ** 2 * variance([fmean(u) for u in us]) / len(us) for s, us in by_stratum.items())
+    else:
+        all_units = [_unit(method, game_rng(seed, unit_id), *policies) for unit_id in range(units)]
+        unit_means = [fmean(unit) for unit in all_units]
+        mean = fmean(unit_means)
+        variance_of_mean = variance(unit_means) / len(all_units)
+
+    games = sum(len(unit) for unit in all_units)
+    naive_variance_of_mean = _naive_unit_variance(all_units) / len(all_units)
+    variance_reduction = naive_variance_of_mean / variance_of_mean if variance_of_mean > 0 else float('inf')
+
+    std_error = variance_of_mean ** 0.5
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return {
+        'policy_a': policy_a,
+        'policy_b': policy_b,
+        'method': method,
+        'strata': strata if method == 'stratified' else None,
+        'units': len(all_units),
+        'games': games,
+        'edge': mean,
+        'std_error': std_error,
+        'confidence': confidence,
+        'ci_low': mean - z * std_error,
+        'ci_high': mean + z * std_error,
+        'variance_reduction': variance_reduction,
+        'effective_games': games * variance_reduction,
+    }
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare two Scopa policies with variance-reduced estimators.')
+    parser.add_argument('--policies', nargs=2, default=['safe_discard', 'random'], help='Policies A and B')
+    parser.add_argument('--units', type=int, default=1000, help='Number of sampling units')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the deals')
+    parser.add_argument('--method', type=str, default='crn', choices=METHODS + ['all'], help='Estimator to use')
+    parser.add_argument('--strata', type=str, default='settebello', choices=list(STRATA), help='Strata of the stratified estimator')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the interval')
+    args = parser.parse_args()
+
+    for method in (METHODS if args.method == 'all' else [args.method]):
+        result = compare_strategies(*args.policies, units=args.units, seed=args.seed, method=method,
+                                    strata=args.strata, confidence=args.confidence)
+        print(json.dumps(result, indent=4))
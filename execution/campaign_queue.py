@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait
+
+# Define script directory, so that the simulation modules can be imported from anywhere
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '../simulation_basis'))
+
+from batch_simulation import simulate_games, check_policies, empty_results, merge_results
+
+
+
+# A campaign lives in a single shared directory (e.g. on a network file system), with no broker involved:
+#   campaign.json          -> games, seed, policies and shard size
+#   pending/<shard>        -> shards nobody is working on
+#   claimed/<shard>@<who>  -> shards being played; claimed by renaming them out of 'pending/', kept fresh by heartbeats
+#   results/<shard>.json   -> aggregate results of finished shards
+#   summary.json           -> written by the coordinator once every shard has a result
+# Renames within the same file system are atomic, so exactly one worker wins every claim.
+SHARD_GAMES = 10000
+HEARTBEAT_INTERVAL = 5.0   # seconds between two touches of a claim
+STALE_AFTER = 60.0         # claims not touched for this long are considered dead and put back in 'pending/'
+POLL_INTERVAL = 1.0
+CLAIM_SEPARATOR = '@'
+
+
+def _paths(queue_dir):
+    return {name: os.path.join(queue_dir, name) for name in ('pending', 'claimed', 'results')}
+
+
+def _shard_name(first_game, games):
+    return f'shard_{first_game:010d}_{games}'
+
+
+def _parse_shard_name(shard):
+    _, first_game, games = shard.split('_')
+    return int(first_game), int(games)
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def load_campaign(queue_dir):
+    with open(os.path.join(queue_dir, 'campaign.json'), 'r') as f:
+        return json.load(f)
+
+
+def init_campaign(queue_dir, games, seed=0, policies=('random', 'random'), shard_games=SHARD_GAMES):
+    """Splits a campaign of 'games' games into seed-range shards under 'queue_dir'."""
+    check_policies(policies)
+    assert not os.path.exists(os.path.join(queue_dir, 'campaign.json')), f"a campaign already exists in {queue_dir}"
+    paths = _paths(queue_dir)
+    for path in paths.values():
+        os.makedirs(path, exist_ok=True)
+
+    shards = [_shard_name(first, min(shard_games, games - first)) for first in range(0, games, shard_games)]
+    for shard in shards:
+        open(os.path.join(paths['pending'], shard), 'w').close()
+
+    # the campaign file is written last - workers only start claiming once it exists
+    _write_json_atomic(os.path.join(queue_dir, 'campaign.json'),
+                       {'games': games, 'seed': seed, 'policies': list(policies), 'shard_games': shard_games, 'shards': len(shards)})
+    return shards
+
+
+def claim_shard(queue_dir, worker_id):
+    """Claims a pending shard for 'worker_id'; returns the path of the claim, or None if nothing is pending."""
+    paths = _paths(queue_dir)
+    for shard in sorted(os.listdir(paths['pending'])):
+        pending = os.path.join(paths['pending'], shard)
+        claim = os.path.join(paths['claimed'], f'{shard}{CLAIM_SEPARATOR}{worker_id}')
+        try:
+            # touched before the rename, so that the claim never shows up with the old mtime of the pending file and
+            # gets requeued as stale before its first heartbeat
+            os.utime(pending)
+            os.rename(pending, claim)
+        except FileNotFoundError:
+            continue  # another worker got there first
+        return claim
+    return None
+
+
+def completed_shards(queue_dir):
+    return {name[:-len('.json')] for name in os.listdir(_paths(queue_dir)['results']) if name.endswith('.json')}
+
+
+def requeue_stale_claims(queue_dir, stale_after=STALE_AFTER):
+    """Puts back in 'pending/' the claims whose worker has stopped sending heartbeats; returns the shards requeued."""
+    paths = _paths(queue_dir)
+    done = completed_shards(queue_dir)
+    now = time.time()
+    requeued = []
+    for claim in os.listdir(paths['claimed']):
+        shard = claim.split(CLAIM_SEPARATOR)[0]
+        claim_path = os.path.join(paths['claimed'], claim)
+        try:
+            if shard in done:
+                os.remove(claim_path)  # the worker died between writing its result and releasing its claim
+            elif now - os.path.getmtime(claim_path) > stale_after:
+                os.rename(claim_path, os.path.join(paths['pending'], shard))
+                requeued.append(shard)
+        except FileNotFoundError:
+            continue  # released or requeued in the meantime
+    return requeued
+
+
+
+def _run_shard(executor, processes, claim, campaign, heartbeat_interval):
+    first_game, games = _parse_shard_name(os.path.basename(claim).split(CLAIM_SEPARATOR)[0])
+    chunk = -(-games // processes)
+    futures = [
+        executor.submit(simulate_games, first, min(chunk, first_game + games - first), campaign['seed'], tuple(campaign['policies']))
+        for first in range(first_game, first_game + games, chunk)
+    ]
+
+    pending = futures
+    while pending:
+        _, pending = wait(pending, timeout=heartbeat_interval)
+        try:
+            os.utime(claim)
+        except FileNotFoundError:
+            pass  # the claim was considered stale and requeued - the result is deterministic, so finishing it is harmless
+
+    results = empty_results()
+    for future in futures:
+        merge_results(results, future.result())
+    return results
+
+
+def run_worker(queue_dir, worker_id=None, processes=None, heartbeat_interval=HEARTBEAT_INTERVAL, poll_interval=POLL_INTERVAL):
+    """
+    Claims and plays shards on a local process pool until every shard of the campaign has a result.
+    Can run on any host that sees 'queue_dir'; returns the number of shards this worker completed.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    processes = processes or os.cpu_count() or 1
+    paths = _paths(queue_dir)
+
+    while not os.path.exists(os.path.join(queue_dir, 'campaign.json')):
+        time.sleep(poll_interval)
+    campaign = load_campaign(queue_dir)
+
+    completed = 0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        while len(completed_shards(queue_dir)) < campaign['shards']:
+            claim = claim_shard(queue_dir, worker_id)
+            if claim is None:
+                # everything is claimed - wait in case a dead worker's shard gets requeued
+                time.sleep(poll_interval)
+                continue
+
+            started = time.time()
+            results = _run_shard(executor, processes, claim, campaign, heartbeat_interval)
+            shard = os.path.basename(claim).split(CLAIM_SEPARATOR)[0]
+            _write_json_atomic(os.path.join(paths['results'], f'{shard}.json'),
+                               {'shard': shard, 'worker': worker_id, 'seconds': time.time() - started, 'results': results})
+            try:
+                os.remove(claim)
+            except FileNotFoundError:
+                pass
+            completed += 1
+
+    return completed
+
+
+def run_coordinator(queue_dir, stale_after=STALE_AFTER, poll_interval=POLL_INTERVAL):
+    """Requeues stale claims until every shard has a result, then aggregates them into 'summary.json' and returns it."""
+    campaign = load_campaign(queue_dir)
+    paths = _paths(queue_dir)
+
+    while len(completed_shards(queue_dir)) < campaign['shards']:
+        for shard in requeue_stale_claims(queue_dir, stale_after):
+            print(f'Requeued stale shard {shard}')
+        time.sleep(poll_interval)
+    requeue_stale_claims(queue_dir, stale_after)  # clears claims left behind by workers that died after finishing
+
+    results = empty_results()
+    workers = {}
+    for shard in sorted(completed_shards(queue_dir)):
+        with open(os.path.join(paths['results'], f'{shard}.json'), 'r') as f:
+            snapshot = json.load(f)
+        merge_results(results, snapshot['results'])
+        workers[snapshot['worker']] = workers.get(snapshot['worker'], 0) + 1
+
+    assert results['games'] == campaign['games'], f"expected {campaign['games']} games, got {results['games']}"
+    summary = {'campaign': campaign, 'results': results, 'shards_per_worker': workers}
+    _write_json_atomic(os.path.join(queue_dir, 'summary.json'), summary)
+    return summary
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a Scopa campaign through a shared directory work queue.')
+    subparsers = parser.add_subparsers(dest='role', required=True)
+
+    init_parser = subparsers.add_parser('init', help='Split a new campaign into shards')
+    init_parser.add_argument('--games', type=int, required=True, help='Number of games of the campaign')
+    init_parser.add_argument('--seed', type=int, default=0, help='Seed of the campaign')
+    init_parser.add_argument('--policies', nargs=2, default=['random', 'random'], help='Policies of player 1 and player 2')
+    init_parser.add_argument('--shard_games', type=int, default=SHARD_GAMES, help='Games per shard')
+
+    worker_parser = subparsers.add_parser('worker', help='Claim and play shards')
+    worker_parser.add_argument('--worker_id', type=str, default=None, help='Name of the worker (defaults to host-pid)')
+    worker_parser.add_argument('--processes', type=int, default=None, help='Local processes (defaults to the CPU count)')
+
+    coordinator_parser = subparsers.add_parser('coordinator', help='Requeue stale claims and aggregate the results')
+    coordinator_parser.add_argument('--stale_after', type=float, default=STALE_AFTER, help='Seconds after which a claim is stale')
+
+    for subparser in (init_parser, worker_parser, coordinator_parser):
+        subparser.add_argument('--queue_dir', type=str, required=True, help='Shared campaign directory')
+    args = parser.parse_args()
+
+    if args.role == 'init':
+        shards = init_campaign(args.queue_dir, args.games, seed=args.seed, policies=tuple(args.policies), shard_games=args.shard_games)
+        print(f'Created {len(shards)} shards in {args.queue_dir}')
+    elif args.role == 'worker':
+        print(f'Completed {run_worker(args.queue_dir, worker_id=args.worker_id, processes=args.processes)} shards')
+    else:
+        print(json.dumps(run_coordinator(args.queue_dir, stale_after=args.stale_after), indent=4))
@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import gzip
+import json
+import argparse
+from multiprocessing import Pool
+
+# Define script directory, so that the execution modules can be imported from anywhere
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from simple_parallelization import build_game_analysis, GAME_LOGS_DIR
+
+
+
+# The compact format is a directory of gzipped JSON-lines shards plus a manifest:
+#   compact_<n>.jsonl.gz -> one line per game: {"instance_id": i, "game_log": [...], "analysis_rebuilt": true}
+#                           "game_log" is there only if the game log file was, and when the analysis file exists either
+#                           "analysis_rebuilt" is set or, if the analysis cannot be rebuilt from the game log, "analysis": [...]
+#   manifest.json        -> games and actions of every shard
+# The analysis files are rebuilt with 'build_game_analysis()', which is how they were produced in the first place.
+# Games of an interrupted run have a game log but no analysis yet - nothing is rebuilt for them.
+GAMES_PER_SHARD = 10000
+GAME_LOG_PATTERN = re.compile(r'^game_logs_(\d+)\.json$')
+ANALYSIS_PATTERN = re.compile(r'^game_(\d+)_analysis\.json$')
+
+
+def scan_logs(logs_dir):
+    """Maps every instance id found in 'logs_dir' to its (game log path, analysis path), either of which may be None."""
+    found = {}
+    with os.scandir(logs_dir) as entries:
+        for entry in entries:
+            for slot, pattern in enumerate((GAME_LOG_PATTERN, ANALYSIS_PATTERN)):
+                match = pattern.match(entry.name)
+                if match:
+                    paths = found.setdefault(int(match.group(1)), [None, None])
+                    paths[slot] = entry.path
+    return found
+
+
+MISSING = object()
+
+
+def _read_json(path):
+    if path is None:
+        return MISSING
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compact_record(instance_id, game_log, analysis):
+    """'game_log' / 'analysis' are the parsed files, or 'MISSING' when the file does not exist."""
+    record = {'instance_id': instance_id}
+    if game_log is not MISSING:
+        record['game_log'] = game_log
+    if analysis is not MISSING:
+        # 'initialize_game_log()' leaves 'null' behind for games that never completed - nothing to rebuild from then
+        if game_log and build_game_analysis(game_log, instance_id) == analysis:
+            record['analysis_rebuilt'] = True
+        else:
+            record['analysis'] = analysis
+    return record
+
+
+def expand_record(record):
+    """
+    Returns (instance_id, game_log, analysis) from a compacted record, rebuilding the analysis when it was left out.
+    Files that did not exist (or held 'null') come back as None.
+    """
+    instance_id = record['instance_id']
+    game_log = record.get('game_log')
+    if record.get('analysis_rebuilt'):
+        analysis = build_game_analysis(game_log, instance_id)
+    else:
+        analysis = record.get('analysis')
+    return instance_id, game_log, analysis
+
+
+def _count_actions(game_log, analysis):
+    return sum(len(content) for content in (game_log, analysis) if content is not MISSING and content)
+
+
+def _compact_shard(task):
+    out_dir, shard_name, items = task
+    games = 0
+    actions = 0
+    shard_path = os.path.join(out_dir, shard_name)
+    tmp_path = shard_path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for instance_id, (game_log_path, analysis_path) in items:
+            game_log, analysis = _read_json(game_log_path), _read_json(analysis_path)
+            f.write(json.dumps(compact_record(instance_id, game_log, analysis), separators=(',', ':')) + '\n')
+            games += 1
+            actions += _count_actions(game_log, analysis)
+
+    # read the shard back before trusting it with the originals
+    read_games = 0
+    read_actions = 0
+    for record in iter_shard(tmp_path):
+        _, game_log, analysis = expand_record(record)
+        read_games += 1
+        read_actions += _count_actions(game_log, analysis)
+    # checked explicitly rather than asserted, since the originals may be deleted on the strength of it
+    if (read_games, read_actions) != (games, actions):
+        os.remove(tmp_path)
+        raise RuntimeError(f"{shard_name}: wrote {games} games / {actions} actions, read back {read_games} / {read_actions}")
+
+    os.replace(tmp_path, shard_path)
+    return {'name': shard_name, 'games': games, 'actions': actions}
+
+
+def iter_shard(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def iter_compacted(out_dir):
+    """Yields (instance_id, game_log, analysis) for every game of a compacted directory."""
+    with open(os.path.join(out_dir, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+    for shard in manifest['shards']:
+        for record in iter_shard(os.path.join(out_dir, shard['name'])):
+            yield expand_record(record)
+
+
+def compact_logs(logs_dir, out_dir, games_per_shard=GAMES_PER_SHARD, processes=None, delete_originals=False):
+    """
+    Converts the game logs and analysis files of 'logs_dir' into compact shards in 'out_dir', reading them with a
+    process pool. Originals are deleted only when asked to, and only once every shard has been verified.
+    'out_dir' must not hold a compacted directory already: game ids restart with every simulation run, so shards of
+    another run can neither be replaced nor merged with.
+    """
+    if os.path.isdir(out_dir) and any(name == 'manifest.json' or name.startswith('compact_') for name in os.listdir(out_dir)):
+        raise FileExistsError(f"{out_dir} already holds compacted logs - compact into a new directory")
+    found = scan_logs(logs_dir)
+    instance_ids = sorted(found)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = [
+        (out_dir, f'compact_{n:05d}.jsonl.gz', [(i, found[i]) for i in instance_ids[start:start + games_per_shard]])
+        for n, start in enumerate(range(0, len(instance_ids), games_per_shard))
+    ]
+    with Pool(processes) as pool:
+        shards = list(pool.imap(_compact_shard, tasks))
+
+    source_files = [path for paths in found.values() for path in paths if path is not None]
+    manifest = {
+        'games': sum(shard['games'] for shard in shards),
+        'actions': sum(shard['actions'] for shard in shards),
+        'source_files': len(source_files),
+        'source_bytes': sum(os.path.getsize(path) for path in source_files),
+        'compacted_bytes': sum(os.path.getsize(os.path.join(out_dir, shard['name'])) for shard in shards),
+        'shards': shards
+    }
+    if manifest['games'] != len(instance_ids):
+        raise RuntimeError(f"expected {len(instance_ids)} games, compacted {manifest['games']}")
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    if delete_originals:
+        for path in source_files:
+            os.remove(path)
+    return manifest
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compact game logs and analyses into gzipped JSON-lines shards.')
+    parser.add_argument('--logs_dir', type=str, default=GAME_LOGS_DIR, help='Directory holding the game logs')
+    parser.add_argument('--out_dir', type=str, default=os.path.join(GAME_LOGS_DIR, 'compact'), help='Output directory')
+    parser.add_argument('--games_per_shard', type=int, default=GAMES_PER_SHARD, help='Games per shard')
+    parser.add_argument('--processes', type=int, default=None, help='Reader processes (defaults to the CPU count)')
+    parser.add_argument('--delete_originals', action='store_true', help='Delete the original files once verified')
+    args = parser.parse_args()
+
+    manifest = compact_logs(args.logs_dir, args.out_dir, games_per_shard=args.games_per_shard,
+                            processes=args.processes, delete_originals=args.delete_originals)
+    print(f"Compacted {manifest['games']} games: {manifest['source_files']} files / {manifest['source_bytes']} bytes -> "
+          f"{len(manifest['shards']) + 1} files / {manifest['compacted_bytes']} bytes")
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import argparse
+from multiprocessing import Process, shared_memory
+
+import numpy as np
+
+# Define script directory, so that the simulation modules can be imported from anywhere
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '../simulation_basis'))
+
+from scopa_state import GameState
+from batch_simulation import POLICIES, check_policies
+
+
+
+# Fixed layout of the result of a single game, as written by the workers into shared memory
+RESULT_DTYPE = np.dtype([
+    ('seed', np.int64),
+    ('game_id', np.int64),
+    ('p1_score', np.int16), ('p2_score', np.int16),
+    ('p1_cards_point', np.int8), ('p2_cards_point', np.int8),
+    ('p1_sette_bello_point', np.int8), ('p2_sette_bello_point', np.int8),
+    ('p1_diamonds_point', np.int8), ('p2_diamonds_point', np.int8),
+    ('p1_primiera_point', np.int8), ('p2_primiera_point', np.int8),
+    ('p1_scopas', np.int8), ('p2_scopas', np.int8),
+    ('moves', np.int8),
+    ('seq', np.int64),         # position of the record in its worker's stream
+    ('checksum', np.uint64),   # over every other field, see '_checksum_weights'
+])
+COMPONENTS = ['cards_point', 'sette_bello_point', 'diamonds_point', 'primiera_point', 'scopas']
+
+_CHECKED_FIELDS = RESULT_DTYPE.names[:-1]
+_UINT64_MASK = (1 << 64) - 1
+# one odd multiplier per checked field; sums wrap around at 64 bits, in the workers as in NumPy
+_checksum_weights = [((2 * i + 1) * 0x9E3779B97F4A7C15) & _UINT64_MASK for i in range(len(_CHECKED_FIELDS))]
+
+RING_CAPACITY = 4096  # records per worker ring
+_COUNTER_STRIDE = 8   # head and tail counters are 64 bytes apart, so that producer and consumer do not share a cache line
+POLL_INTERVAL = 0.0005
+
+
+class ResultRings:
+    """
+    One single-producer / single-consumer ring buffer of 'RESULT_DTYPE' records per worker, all in a single
+    'multiprocessing.shared_memory' block:
+        counters  int64 (2, workers, _COUNTER_STRIDE) - [0, w, 0] records written by worker w, [1, w, 0] records consumed
+        records   RESULT_DTYPE (workers, capacity)
+
+    Worker w only ever writes its head counter and the aggregator its tail counter, and a record is always written
+    before the head moves past it. Python has no memory barriers, though: on CPUs that reorder stores (ARM, Apple
+    silicon) the aggregator may see the new head before the bytes of the record. Every record therefore carries its
+    sequence number and a checksum, and the aggregator only takes the records that check out ('verified_count()'),
+    leaving the others for its next pass. On the consumer side, a batch is fully reduced before the tail moves past it.
+    """
+
+    def __init__(self, workers, capacity=RING_CAPACITY, name=None):
+        self.workers = workers
+        self.capacity = capacity
+        counters_size = 2 * workers * _COUNTER_STRIDE * 8
+        size = counters_size + workers * capacity * RESULT_DTYPE.itemsize
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.counters = np.ndarray((2, workers, _COUNTER_STRIDE), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray((workers, capacity), dtype=RESULT_DTYPE, buffer=self.shm.buf, offset=counters_size)
+        if self.owner:
+            self.counters[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def push(self, worker, record):
+        """
+        Producer side: writes 'record' (a tuple in 'RESULT_DTYPE' order, without the sequence number and checksum) into
+        the ring of 'worker', waiting while it is full.
+        """
+        head = int(self.counters[0, worker, 0])
+        while head - int(self.counters[1, worker, 0]) >= self.capacity:
+            time.sleep(POLL_INTERVAL)
+        record = tuple(record) + (head,)
+        checksum = sum((value & _UINT64_MASK) * weight for value, weight in zip(record, _checksum_weights)) & _UINT64_MASK
+        self.records[worker, head % self.capacity] = record + (checksum,)
+        self.counters[0, worker, 0] = head + 1
+
+    def pending_views(self, worker):
+        """Consumer side: views (no copies) of the records of 'worker' not consumed yet - two of them when the ring wraps."""
+        tail = int(self.counters[1, worker, 0])
+        head = int(self.counters[0, worker, 0])
+        start, end = tail % self.capacity, tail % self.capacity + head - tail
+        ring = self.records[worker]
+        if end <= self.capacity:
+            return [ring[start:end]] if end > start else []
+        return [ring[start:], ring[:end - self.capacity]]
+
+    @staticmethod
+    def verified_count(view, first_seq):
+        """Number of leading records of 'view' that are complete: expected sequence numbers from 'first_seq', matching checksums."""
+        checksums = np.zeros(len(view), dtype=np.uint64)
+        for name, weight in zip(_CHECKED_FIELDS, _checksum_weights):
+            checksums += view[name].astype(np.uint64) * np.uint64(weight)
+        valid = (view['seq'] == np.arange(first_seq, first_seq + len(view))) & (checksums == view['checksum'])
+        return len(view) if valid.all() else int(np.argmin(valid))
+
+    def consume(self, worker, count):
+        self.counters[1, worker, 0] += count
+
+    def close(self):
+        # views into the block need to go before it can be closed
+        del self.counters, self.records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+
+class ResultAggregator:
+    """Running totals over record views; 'add()' only reduces the view, it never copies it."""
+
+    def __init__(self):
+        self.totals = {'games': 0, 'moves': 0, 'p1_wins': 0, 'p2_wins': 0, 'ties': 0, 'p1_points': 0, 'p2_points': 0}
+        for player in ('p1', 'p2'):
+            for component in COMPONENTS:
+                self.totals[f'{player}_{component}'] = 0
+
+    def add(self, view):
+        p1_score, p2_score = view['p1_score'], view['p2_score']
+        self.totals['games'] += len(view)
+        self.totals['moves'] += int(view['moves'].sum())
+        self.totals['p1_wins'] += int(np.count_nonzero(p1_score > p2_score))
+        self.totals['p2_wins'] += int(np.count_nonzero(p2_score > p1_score))
+        self.totals['ties'] += int(np.count_nonzero(p1_score == p2_score))
+        self.totals['p1_points'] += int(p1_score.sum())
+        self.totals['p2_points'] += int(p2_score.sum())
+        for player in ('p1', 'p2'):
+            for component in COMPONENTS:
+                self.totals[f'{player}_{component}'] += int(view[f'{player}_{component}'].sum())
+
+
+
+def _worker(ring_name, workers, capacity, worker, first_game, games, seed, policy_names):
+    rings = ResultRings(workers, capacity, name=ring_name)
+    policies = [POLICIES[name] for name in policy_names]
+    try:
+        for game_id in range(first_game, first_game + games):
+            state, rng = GameState.seeded(seed, game_id)
+            while not state.is_over():
+                state.apply(policies[state.current](state, state.legal_moves(), rng))
+
+            player_1_components, player_2_components = state.score_components()
+            record = [seed, game_id, sum(player_1_components), sum(player_2_components)]
+            for player_1_item, player_2_item in zip(player_1_components, player_2_components):
+                record += [player_1_item, player_2_item]
+            record.append(state.move_count)
+            rings.push(worker, tuple(record))
+    finally:
+        rings.close()
+
+
+def run_shared(games, seed=0, policy_names=('random', 'random'), workers=None, capacity=RING_CAPACITY, on_records=None):
+    """
+    Simulates 'games' games across 'workers' processes that send their results back through shared memory ring
+    buffers. The aggregator reduces every batch of records in place; 'on_records(view)' also receives each batch as a
+    read-only structured-array view, valid only until the call returns. Returns the aggregate totals.
+    """
+    check_policies(policy_names)
+    workers = workers or os.cpu_count() or 1
+    rings = ResultRings(workers, capacity)
+    aggregator = ResultAggregator()
+
+    per_worker = -(-games // workers)
+    processes = []
+    finished = False
+    try:
+        for worker in range(workers):
+            first_game = worker * per_worker
+            count = max(0, min(per_worker, games - first_game))
+            process = Process(target=_worker, args=(rings.name, workers, capacity, worker, first_game, count, seed, tuple(policy_names)))
+            process.start()
+            processes.append(process)
+
+        while aggregator.totals['games'] < games:
+            drained = 0
+            for worker in range(workers):
+                for pending in rings.pending_views(worker):
+                    count = rings.verified_count(pending, int(rings.counters[1, worker, 0]))
+                    view = pending[:count]
+                    view.flags.writeable = False
+                    aggregator.add(view)
+                    if on_records is not None:
+                        on_records(view)
+                    rings.consume(worker, count)
+                    drained += count
+                    if count < len(pending):
+                        break  # the rest has not fully arrived yet
+            if not drained:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError('a simulation worker died before sending all of its results')
+                time.sleep(POLL_INTERVAL)
+        finished = True
+    finally:
+        for process in processes:
+            if not finished:
+                # nobody drains the rings anymore, so workers waiting in 'push()' would never return
+                process.terminate()
+            process.join()
+        rings.close()
+
+    return aggregator.totals
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulate Scopa games, collecting results through shared memory.')
+    parser.add_argument('--games', type=int, default=10000, help='Number of games to simulate')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the simulated games')
+    parser.add_argument('--policies', nargs=2, default=['random', 'random'], help='Policies of player 1 and player 2')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the CPU count)')
+    parser.add_argument('--capacity', type=int, default=RING_CAPACITY, help='Records per worker ring buffer')
+    args = parser.parse_args()
+
+    print(json.dumps(run_shared(args.games, seed=args.seed, policy_names=args.policies, workers=args.workers, capacity=args.capacity), indent=4))
@@ -1,9 +1,10 @@
 import os
+import sys
 import subprocess
-from time import sleep
 import json
 import threading
 
+from telemetry import AppendingLogWriter, BufferedLogWriter, Telemetry
 
 
 # Define script directory
@@ -13,6 +14,7 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 GAME_SCRIPT = os.path.join(script_dir, '../simulation_basis/scopa_w_logging.py')
 SIMULATION_LOG = os.path.join(script_dir, '../execution/scopa_simulation.log')
 GAME_LOGS_DIR = os.path.join(script_dir, '../logs/')
+METRICS_FILE = os.path.join(script_dir, '../execution/scopa_metrics.jsonl')
 # ANALYSIS_LOG = os.path.join(script_dir, 'scopa_analysis.log')
 
 # Buffer setup
@@ -20,6 +22,8 @@ BUFSIZE = 100
 buffer = [-1] * BUFSIZE  # the buffer is a shared resource
 nextin = 0  # this is because games have been numbered starting from 1
 nextout = 0  # same
+produced = 0  # games simulated so far
+consumed = 0  # games analysed so far
 
 # Number of simulation-analysis pairs to run
 NITEMS = 100
@@ -28,11 +32,16 @@ mutex = threading.Lock()  # lock assuring mutual exclusion - only one thread can
 empty = threading.Semaphore(BUFSIZE)  # tracks empty slots in the buffer (aka further game simulations that can take place)
 full = threading.Semaphore(0)  # tracks full slots in the buffer (aka further game analyses that can take place)
 
-# Ensure the logs directory exists
-os.makedirs('logs', exist_ok=True)
+# Defaults for when the functions below are imported and called directly: a plain writer opening SIMULATION_LOG for
+# every game, and telemetry that is never started, so it only counts. A run (see `__main__`) replaces both with a
+# buffered writer kept open for the whole run and periodic games/sec, moves/sec, queue depth, utilization and ETA reports.
+simulation_log = AppendingLogWriter(SIMULATION_LOG)
+telemetry = Telemetry(NITEMS)
 
 def initialize_game_log(instance_id):
-    log_file = f'../logs/game_logs_{instance_id}.json'
+    # Ensure the logs directory exists (here rather than at import time, so that importing this module writes nothing)
+    os.makedirs(GAME_LOGS_DIR, exist_ok=True)
+    log_file = os.path.join(GAME_LOGS_DIR, f'game_logs_{instance_id}.json')
 
     # Now write the log
     with open(log_file, 'w') as f:
@@ -45,26 +54,20 @@ def run_game(instance_id):
 
     try:
         # Run the game script with the provided instance ID
-        subprocess.run(['python', GAME_SCRIPT, f'--instance_id={instance_id}'], check=True)
+        subprocess.run([sys.executable, GAME_SCRIPT, f'--instance_id={instance_id}', f'--log_dir={GAME_LOGS_DIR}'], check=True)
         log_message = f'Game {instance_id} completed successfully.\n'
     except subprocess.CalledProcessError as e:
         log_message = f'Game {instance_id} failed with error: {e}\n'
 
     # Write the log message to SIMULATION_LOG (creates file if it doesn't exist)
-    with open(SIMULATION_LOG, 'a') as log_file:
-        log_file.write(log_message)
+    simulation_log.write(log_message)
 
 
 
 
 
-# Function to process a single game log
-def process_game_log(instance_id):
-    game_log_path = os.path.join(script_dir, GAME_LOGS_DIR + f'game_logs_{instance_id}.json')
-    sleep(0.1)
-    with open(game_log_path, 'r') as f:
-        game_data = json.load(f)
-
+def build_game_analysis(game_data, instance_id):
+    """Turns the game log of a single game into its analysis records (what ends up in game_{id}_analysis.json)."""
     actions_analysis = []
     final_input = game_data[-1]
     final_player_1_score = final_input.get('final_player_1_score')
@@ -90,21 +93,39 @@ def process_game_log(instance_id):
         }
         actions_analysis.append(analysis)
 
+    return actions_analysis
+
+
+# Function to process a single game log
+def process_game_log(instance_id):
+    # 'run_game()' has waited for the game script to exit before the game was put in the buffer, so its log is complete
+    game_log_path = os.path.join(script_dir, GAME_LOGS_DIR + f'game_logs_{instance_id}.json')
+    with open(game_log_path, 'r') as f:
+        game_data = json.load(f)
+
+    actions_analysis = build_game_analysis(game_data, instance_id)
+
     analysis_log_file = GAME_LOGS_DIR + f'game_{instance_id}_analysis.json'
     with open(analysis_log_file, 'w') as f:
         json.dump(actions_analysis, f, indent=4)
 
+    # the last entry of a game log repeats the last move, along with the final scores
+    return len(game_data) - 1
+
     
 
 
 def simulation():
     global nextin
     global buffer
+    global produced
     for instance_id in range(NITEMS):
         empty.acquire()  # decreases the `empty` semaphore - this would make the simulation/`producer` thread to wait in case the buffer is full
         mutex.acquire()  # ensures that only a single simulation/`producer` thread would be able to 
-        run_game(instance_id)
+        with telemetry.busy('simulation'):
+            run_game(instance_id)
         buffer[nextin] = instance_id
+        produced += 1
         # print(f'Producer: produced {instance_id} in slot {nextin}')
         nextin = (nextin + 1) % BUFSIZE
         mutex.release()
@@ -114,11 +135,15 @@ def simulation():
 def analysis():
     global nextout
     global buffer
+    global consumed
     for i in range(NITEMS):
         full.acquire()
         mutex.acquire()
         instance_id = buffer[nextout]
-        process_game_log(instance_id)
+        with telemetry.busy('analysis'):
+            moves = process_game_log(instance_id)
+        consumed += 1
+        telemetry.game_done(moves)
         # print(f'Consumer: consumed {instance_id} from slot {nextout}')
         nextout = (nextout + 1) % BUFSIZE
         mutex.release()
@@ -128,11 +153,15 @@ def analysis():
 
 
 if __name__ == "__main__":
+    simulation_log = BufferedLogWriter(SIMULATION_LOG)
+    telemetry = Telemetry(NITEMS, metrics_path=METRICS_FILE, queue_depth=lambda: produced - consumed)
+
     t1 = threading.Thread(target=simulation)
     t2 = threading.Thread(target=analysis)
 
-    t1.start()
-    t2.start()
+    with simulation_log, telemetry:
+        t1.start()
+        t2.start()
 
-    t1.join()
-    t2.join()
+        t1.join()
+        t2.join()
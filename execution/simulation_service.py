@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import http.client
+from concurrent.futures import ProcessPoolExecutor
+
+# Define script directory, so that the simulation modules can be imported from anywhere
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '../simulation_basis'))
+
+from batch_simulation import simulate_games, empty_results, merge_results, POLICIES
+
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CHUNK_GAMES = 500  # games simulated by a worker before progress is reported back
+MAX_BODY_SIZE = 64 * 1024
+MAX_JOB_GAMES = 10_000_000  # every chunk of a job is queued on the pool up front, so a job has to stay within bounds
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+def _warm_up():
+    # run a single game so that every worker has finished its imports before the first job arrives
+    simulate_games(0, 1)
+    return os.getpid()
+
+
+def _parse_job(body):
+    """Validates a job sent by a client - anything wrong with it raises a ValueError, answered with a 400."""
+    job = json.loads(body or b'{}')
+    if not isinstance(job, dict):
+        raise ValueError("the job needs to be a JSON object")
+    games = job.get('games', 100)
+    seed = job.get('seed', 0)
+    policies = job.get('policies', ['random', 'random'])
+    if type(games) != int or games <= 0:
+        raise ValueError("'games' needs to be a positive integer")
+    if games > MAX_JOB_GAMES:
+        raise ValueError(f"'games' can be at most {MAX_JOB_GAMES} - split larger runs into several jobs")
+    if type(seed) != int:
+        raise ValueError("'seed' needs to be an integer")
+    if not isinstance(policies, list) or len(policies) != 2 or not all(isinstance(name, str) for name in policies):
+        raise ValueError("'policies' needs to be a list of two policy names")
+    for name in policies:
+        if name not in POLICIES:
+            raise ValueError(f"unknown policy '{name}' (available: {', '.join(POLICIES)})")
+    return games, seed, tuple(policies)
+
+
+
+class SimulationService:
+    """
+    Long-lived local HTTP/JSON service running simulations on a warm process pool.
+
+    Endpoints:
+        GET  /health  -> {"status": "ok", "workers": n, "policies": [...]}
+        POST /jobs    -> body {"games": N, "seed": S, "policies": ["random", "safe_discard"]}; the response streams one JSON
+                         line per finished chunk ({"event": "progress", ...}) and ends with {"event": "done", "results": {...}}
+
+    Requests are handled on an asyncio event loop, while the games themselves run in the process pool.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, chunk_games=CHUNK_GAMES):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_games = chunk_games
+        self.executor = None
+        self.server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)))
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # with port 0 the OS picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if len(request_line) < 2:
+                return await self._send_json(writer, 400, {'error': 'malformed request line'})
+            method, path = request_line[0], request_line[1]
+
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                return await self._send_json(writer, 400, {'error': 'invalid Content-Length header'})
+            if length > MAX_BODY_SIZE:
+                return await self._send_json(writer, 413, {'error': 'request body too large'})
+            body = await reader.readexactly(length) if length else b''
+
+            if path == '/health':
+                if method != 'GET':
+                    return await self._send_json(writer, 405, {'error': 'use GET'})
+                return await self._send_json(writer, 200, {'status': 'ok', 'workers': self.workers, 'policies': list(POLICIES)})
+
+            if path == '/jobs':
+                if method != 'POST':
+                    return await self._send_json(writer, 405, {'error': 'use POST'})
+                try:
+                    games, seed, policies = _parse_job(body)
+                except ValueError as e:  # json.JSONDecodeError included
+                    return await self._send_json(writer, 400, {'error': str(e)})
+                return await self._run_job(writer, games, seed, policies)
+
+            return await self._send_json(writer, 404, {'error': f'unknown path {path}'})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_json(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write(f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                     f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+        await writer.drain()
+
+    async def _run_job(self, writer, games, seed, policies):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                     b'Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n')
+
+        async def send_line(payload):
+            line = json.dumps(payload).encode() + b'\n'
+            writer.write(f'{len(line):x}\r\n'.encode() + line + b'\r\n')
+            await writer.drain()
+
+        loop = asyncio.get_running_loop()
+        chunks = [
+            loop.run_in_executor(self.executor, simulate_games, first, min(self.chunk_games, games - first), seed, policies)
+            for first in range(0, games, self.chunk_games)
+        ]
+
+        results = empty_results()
+        try:
+            for chunk in asyncio.as_completed(chunks):
+                merge_results(results, await chunk)
+                await send_line({'event': 'progress', 'games_done': results['games'], 'games': games})
+        except ConnectionError:
+            # the client went away - do not keep the pool busy with the rest of the job
+            for chunk in chunks:
+                chunk.cancel()
+            raise
+
+        await send_line({'event': 'done', 'games': games, 'seed': seed, 'policies': list(policies), 'results': results})
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+
+def submit_job(games, seed=0, policies=('random', 'random'), host=DEFAULT_HOST, port=DEFAULT_PORT, on_progress=None):
+    """Client side: sends a job to a running service, calls 'on_progress(event)' for every progress line and returns the final results."""
+    connection = http.client.HTTPConnection(host, port)
+    try:
+        connection.request('POST', '/jobs', body=json.dumps({'games': games, 'seed': seed, 'policies': list(policies)}),
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f'job rejected ({response.status}): {json.loads(response.read()).get("error")}')
+
+        for line in response:
+            event = json.loads(line)
+            if event['event'] == 'done':
+                return event['results']
+            if on_progress is not None:
+                on_progress(event)
+        raise RuntimeError('the service closed the connection before the job was done')
+    finally:
+        connection.close()
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the local Scopa simulation service.')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the CPU count)')
+    args = parser.parse_args()
+
+    service = SimulationService(host=args.host, port=args.port, workers=args.workers)
+    print(f'Serving simulations on http://{args.host}:{args.port} with {service.workers} workers')
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
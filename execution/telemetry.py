@@ -0,0 +1,170 @@
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+
+class AppendingLogWriter:
+    """Log file opened again for every line - nothing is kept open, so it needs no closing. Same interface as 'BufferedLogWriter'."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, line):
+        with open(self.path, 'a') as f:
+            f.write(line)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+class BufferedLogWriter:
+    """
+    Append-only log file kept open for the whole run. Lines are buffered in memory and written out every 'flush_every'
+    lines or 'flush_interval' seconds, instead of opening the file again for every line.
+    """
+
+    def __init__(self, path, flush_every=100, flush_interval=2.0):
+        self.file = open(path, 'a')
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.lines = []
+        self.last_flush = time.monotonic()
+
+    def write(self, line):
+        with self.lock:
+            self.lines.append(line)
+            if len(self.lines) >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        self.file.write(''.join(self.lines))
+        self.file.flush()
+        self.lines = []
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+class Telemetry:
+    """
+    Throughput metrics of a long simulation run: games/sec, moves/sec, depth of the queue between the simulation and the
+    analysis stages, utilization of every worker and ETA.
+
+    A background thread reports them every 'interval' seconds as a console line and as a JSON line appended to
+    'metrics_path'. Workers report through 'game_done()' and the 'busy()' context manager.
+    """
+
+    def __init__(self, total_games, metrics_path=None, interval=5.0, queue_depth=None, stream=sys.stderr):
+        self.total_games = total_games
+        self.metrics_path = metrics_path
+        self.interval = interval
+        self.queue_depth = queue_depth or (lambda: 0)
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.games = 0
+        self.moves = 0
+        self.busy_seconds = {}
+        self.started = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._metrics_file = None
+
+    def start(self):
+        self.started = time.monotonic()
+        if self.metrics_path is not None:
+            self._metrics_file = open(self.metrics_path, 'a')
+        self._thread = threading.Thread(target=self._report_periodically, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.report()
+        if self._metrics_file is not None:
+            self._metrics_file.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def game_done(self, moves=0):
+        with self.lock:
+            self.games += 1
+            self.moves += moves
+
+    @contextmanager
+    def busy(self, worker):
+        """Counts the time spent inside the block as busy time of 'worker'."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.busy_seconds[worker] = self.busy_seconds.get(worker, 0.0) + time.monotonic() - start
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        with self.lock:
+            games, moves = self.games, self.moves
+            utilization = {worker: min(busy / elapsed, 1.0) for worker, busy in self.busy_seconds.items()}
+        games_per_sec = games / elapsed
+        remaining = self.total_games - games
+        return {
+            'time': time.time(),
+            'elapsed': elapsed,
+            'games': games,
+            'total_games': self.total_games,
+            'games_per_sec': games_per_sec,
+            'moves_per_sec': moves / elapsed,
+            'queue_depth': self.queue_depth(),
+            'utilization': utilization,
+            'eta': remaining / games_per_sec if games_per_sec > 0 else None,
+        }
+
+    def report(self):
+        metrics = self.snapshot()
+        utilization = ' '.join(f'{worker} {share:.0%}' for worker, share in sorted(metrics['utilization'].items()))
+        eta = f"{metrics['eta']:.0f}s" if metrics['eta'] is not None else '?'
+        print(f"[{metrics['elapsed']:.0f}s] {metrics['games']}/{metrics['total_games']} games | "
+              f"{metrics['games_per_sec']:.1f} games/s | {metrics['moves_per_sec']:.0f} moves/s | "
+              f"queue {metrics['queue_depth']} | {utilization} | ETA {eta}", file=self.stream, flush=True)
+        if self._metrics_file is not None:
+            self._metrics_file.write(json.dumps(metrics) + '\n')
+            self._metrics_file.flush()
+        return metrics
+
+    def _report_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.report()
@@ -0,0 +1,182 @@
+import os
+import sys
+import argparse
+
+# Only the standard library modules above are imported at startup; every subcommand imports what it needs when it runs,
+# so that 'pyscopa --help' or a short job (and every worker process it spawns) does not pay for NumPy or the analysis code.
+
+# The simulation, execution and analysis scripts live next to this package in the repository and are not installed with
+# it, so the CLI only works from a source checkout (use 'pip install -e .')
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Time allowed for 'pyscopa --help' to start and exit, checked by 'pyscopa bench --startup'
+STARTUP_BUDGET_MS = 150
+
+# Same as 'strategy_comparison.METHODS', repeated here so that parsing the arguments does not import the analysis code
+TOURNAMENT_METHODS = ['independent', 'crn', 'antithetic', 'stratified']
+
+
+def _use(*dirs):
+    for name in dirs:
+        path = os.path.join(REPO_DIR, name)
+        if not os.path.isdir(path):
+            sys.exit(f"pyscopa: '{name}' not found in {REPO_DIR} - the CLI runs the scripts of a PyScopa source checkout, "
+                     f"so install it from a clone with 'pip install -e .'")
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+    return value
+
+
+def _print_json(payload):
+    import json
+    print(json.dumps(payload, indent=4))
+
+
+
+def simulate(args):
+    if args.features:
+        _use('simulation_basis', 'analysis')
+        from feature_extraction import generate_dataset
+        manifest = generate_dataset(args.features, args.games, seed=args.seed, workers=args.workers)
+        print(f"Wrote {manifest['rows']} rows in {len(manifest['shards'])} shards to {args.features}")
+        return
+
+    if args.shared_memory:
+        _use('simulation_basis', 'execution')
+        from shared_results import run_shared
+        _print_json(run_shared(args.games, seed=args.seed, policy_names=args.policies, workers=args.workers))
+        return
+
+    _use('simulation_basis')
+    from concurrent.futures import ProcessPoolExecutor
+    from batch_simulation import simulate_games, check_policies, empty_results, merge_results
+
+    check_policies(args.policies)
+    workers = args.workers or os.cpu_count() or 1
+    chunk = -(-args.games // workers)
+    results = empty_results()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(simulate_games, first, min(chunk, args.games - first), args.seed, tuple(args.policies))
+                   for first in range(0, args.games, chunk)]
+        for future in futures:
+            merge_results(results, future.result())
+    _print_json(results)
+
+
+def analyze(args):
+    _use('simulation_basis', 'execution')
+    from batch_simulation import empty_results
+    from compact_logs import scan_logs, iter_compacted
+
+    if os.path.exists(os.path.join(args.logs_dir, 'manifest.json')):
+        games = ((game_log, analysis) for _, game_log, analysis in iter_compacted(args.logs_dir))
+    else:
+        import json
+
+        def read(path):
+            if path is None:
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+
+        games = ((read(game_log), read(analysis)) for game_log, analysis in scan_logs(args.logs_dir).values())
+
+    summary = empty_results()
+    for game_log, _ in games:
+        if not game_log:
+            continue  # game that never completed
+        final = game_log[-1]
+        player_1_score, player_2_score = int(final['final_player_1_score']), int(final['final_player_2_score'])
+        summary['games'] += 1
+        summary['moves'] += len(game_log) - 1
+        summary['p1_wins'] += player_1_score > player_2_score
+        summary['p2_wins'] += player_2_score > player_1_score
+        summary['ties'] += player_1_score == player_2_score
+        summary['p1_points'] += player_1_score
+        summary['p2_points'] += player_2_score
+        summary['p1_scopas'] += final['running_player_1_scopas']
+        summary['p2_scopas'] += final['running_player_2_scopas']
+    _print_json(summary)
+
+
+def tournament(args):
+    _use('simulation_basis', 'analysis')
+    from itertools import combinations
+    from strategy_comparison import compare_strategies
+
+    results = []
+    for policy_a, policy_b in combinations(args.policies, 2):
+        result = compare_strategies(policy_a, policy_b, units=args.units, seed=args.seed, method=args.method)
+        results.append(result)
+        print(f"{policy_a} vs {policy_b}: edge {result['edge']:+.3f} "
+              f"[{result['ci_low']:+.3f}, {result['ci_high']:+.3f}] over {result['games']} games", file=sys.stderr)
+    _print_json(results)
+
+
+def bench(args):
+    if args.startup:
+        import subprocess
+        from time import perf_counter
+        from statistics import median
+
+        timings = []
+        for _ in range(args.runs):
+            start = perf_counter()
+            subprocess.run([sys.executable, '-m', 'pyscopa', '--help'], check=True, stdout=subprocess.DEVNULL,
+                           env={**os.environ, 'PYTHONPATH': os.pathsep.join([REPO_DIR, os.environ.get('PYTHONPATH', '')])})
+            timings.append((perf_counter() - start) * 1000)
+        startup_ms = median(timings)
+        print(f'Cold start: {startup_ms:.0f} ms median over {args.runs} runs (budget {STARTUP_BUDGET_MS} ms)')
+        if startup_ms > STARTUP_BUDGET_MS:
+            sys.exit(1)
+        return
+
+    _use('simulation_basis')
+    from scopa_state import bench_apply_undo
+    print(f'{bench_apply_undo(games=args.games, seed=args.seed):,.0f} apply+undo cycles/sec')
+
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='pyscopa', description='Scopa simulation and analysis tools.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    simulate_parser = subparsers.add_parser('simulate', help='Simulate games and print their aggregate results')
+    simulate_parser.add_argument('--games', type=_positive_int, default=1000, help='Number of games to simulate')
+    simulate_parser.add_argument('--seed', type=int, default=0, help='Seed of the simulated games')
+    simulate_parser.add_argument('--policies', nargs=2, default=['random', 'random'], help='Policies of player 1 and player 2')
+    simulate_parser.add_argument('--workers', type=_positive_int, default=None, help='Number of worker processes (defaults to the CPU count)')
+    simulate_parser.add_argument('--features', type=str, default=None, help='Write ML feature shards to this directory instead (needs NumPy)')
+    simulate_parser.add_argument('--shared_memory', action='store_true', help='Collect per-game results and point components through shared memory (needs NumPy)')
+    simulate_parser.set_defaults(handler=simulate)
+
+    analyze_parser = subparsers.add_parser('analyze', help='Summarize a directory of game logs, compacted or not')
+    analyze_parser.add_argument('--logs_dir', type=str, default=os.path.join(REPO_DIR, 'logs'), help='Directory holding the game logs')
+    analyze_parser.set_defaults(handler=analyze)
+
+    tournament_parser = subparsers.add_parser('tournament', help='Compare every pair of policies on common deals')
+    tournament_parser.add_argument('--policies', nargs='+', default=['random', 'safe_discard'], help='Policies taking part')
+    tournament_parser.add_argument('--units', type=int, default=1000, help='Sampling units per pair of policies')
+    tournament_parser.add_argument('--seed', type=int, default=0, help='Seed of the deals')
+    tournament_parser.add_argument('--method', type=str, default='crn', choices=TOURNAMENT_METHODS, help='Estimator to use')
+    tournament_parser.set_defaults(handler=tournament)
+
+    bench_parser = subparsers.add_parser('bench', help='Benchmark apply/undo throughput or the CLI cold start')
+    bench_parser.add_argument('--games', type=_positive_int, default=2000, help='Number of random games to replay')
+    bench_parser.add_argument('--seed', type=int, default=0, help='Seed for the random deals and moves')
+    bench_parser.add_argument('--startup', action='store_true', help='Measure the cold start of the CLI against its budget instead')
+    bench_parser.add_argument('--runs', type=_positive_int, default=10, help='Cold starts to measure')
+    bench_parser.set_defaults(handler=bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
@@ -0,0 +1,55 @@
+from scopa_state import GameState, random_policy
+from belief_state import safe_discard_policy
+from policy_cache import MemoizedPolicy, rollout_evaluator
+
+
+
+# Policies that can be referred to by name by the execution scripts
+POLICIES = {
+    'random': random_policy,
+    'safe_discard': safe_discard_policy,
+    'rollout': MemoizedPolicy(rollout_evaluator()),
+}
+
+RESULT_FIELDS = ['games', 'moves', 'p1_wins', 'p2_wins', 'ties', 'p1_points', 'p2_points', 'p1_scopas', 'p2_scopas']
+
+
+def check_policies(policy_names):
+    assert len(policy_names) == 2, "a game needs exactly two policies"
+    for name in policy_names:
+        assert name in POLICIES, f"unknown policy '{name}' (available: {', '.join(POLICIES)})"
+
+
+def empty_results():
+    return dict.fromkeys(RESULT_FIELDS, 0)
+
+
+def merge_results(total, partial):
+    for field in RESULT_FIELDS:
+        total[field] += partial[field]
+    return total
+
+
+def simulate_games(first_game, games, seed=0, policy_names=('random', 'random')):
+    """Plays games 'first_game' to 'first_game + games - 1' of the run seeded with 'seed' and returns their aggregate results."""
+    check_policies(policy_names)
+    policies = [POLICIES[name] for name in policy_names]
+    results = empty_results()
+
+    for game_id in range(first_game, first_game + games):
+        state, rng = GameState.seeded(seed, game_id)
+        while not state.is_over():
+            state.apply(policies[state.current](state, state.legal_moves(), rng))
+
+        player_1_score, player_2_score = state.scores()
+        results['games'] += 1
+        results['moves'] += state.move_count
+        results['p1_wins'] += player_1_score > player_2_score
+        results['p2_wins'] += player_2_score > player_1_score
+        results['ties'] += player_1_score == player_2_score
+        results['p1_points'] += player_1_score
+        results['p2_points'] += player_2_score
+        results['p1_scopas'] += state.scopas[0]
+        results['p2_scopas'] += state.scopas[1]
+
+    return results
@@ -0,0 +1,181 @@
+from math import comb
+
+from scopa_state import (CARDS, CARD_VALUES, FULL_DECK_MASK, MOVE_CARD_BITS, MOVE_CARD_MASK, COLLECT_PILE_FLAG,
+                         mask_value_sum, random_policy)
+
+
+
+HAND_SIZE = 3
+MAX_VALUE = 10
+CARDS_PER_VALUE = 4
+
+# _HOLD_PROBABILITY[unseen][remaining][hand_size] -> probability that a hand of 'hand_size' cards drawn from 'unseen'
+# cards contains at least one of the 'remaining' cards of a given value
+_HOLD_PROBABILITY = [
+    [
+        [1 - comb(unseen - remaining, hand_size) / comb(unseen, hand_size) if remaining <= unseen and hand_size <= unseen else 0.0
+         for hand_size in range(HAND_SIZE + 1)]
+        for remaining in range(CARDS_PER_VALUE + 1)
+    ]
+    for unseen in range(len(CARDS) + 1)
+]
+
+
+def _bits_value_counts(mask, counts, step):
+    while mask:
+        low = mask & -mask
+        counts[CARD_VALUES[low.bit_length() - 1]] += step
+        mask ^= low
+
+
+
+class BeliefState:
+    """
+    What a single player knows about a game in progress: the cards they have not seen yet (either in the opponent's hand
+    or still in the deck) as a mask, how many cards of every value are still unseen, and what is on the board.
+
+    It is updated once per move with 'observe()' (and with 'observe_deal()' when new hands are dealt), so that queries
+    about the opponent's hand are table lookups rather than scans over the piles.
+    """
+
+    def __init__(self, player, hand, board):
+        self.player = player
+        self.hand = hand
+        self.board = board
+        self.board_sum = mask_value_sum(board)
+        self.unseen = FULL_DECK_MASK & ~(hand | board)
+        self.unseen_count = self.unseen.bit_count()
+        self.opponent_hand_size = HAND_SIZE
+        self.unseen_value_counts = [0] * (MAX_VALUE + 1)
+        _bits_value_counts(self.unseen, self.unseen_value_counts, 1)
+        # number of cards of every value that have ended up in either pile - what 'game()' logs as 'card_value_counts'
+        self.pile_value_counts = [0] * (MAX_VALUE + 1)
+
+    @classmethod
+    def from_state(cls, state, player):
+        """Builds the belief of 'player' (0 or 1) from a 'GameState' at any point of the game."""
+        belief = cls(player, state.hands[player], state.board)
+        deck_mask = 0
+        for i in state.deck_order[state.deck_pos:]:
+            deck_mask |= 1 << i
+        belief._reveal(belief.unseen & ~(state.hands[1 - player] | deck_mask))
+        belief.opponent_hand_size = state.hands[1 - player].bit_count()
+        _bits_value_counts(state.piles[0] | state.piles[1], belief.pile_value_counts, 1)
+        return belief
+
+    def _reveal(self, mask):
+        mask &= self.unseen
+        self.unseen ^= mask
+        self.unseen_count -= mask.bit_count()
+        _bits_value_counts(mask, self.unseen_value_counts, -1)
+
+    def observe(self, move, mover):
+        """Updates the belief with a move (as encoded by 'scopa_state') played by 'mover'."""
+        card = move & MOVE_CARD_MASK
+        card_bit = 1 << card
+        if mover == self.player:
+            self.hand ^= card_bit
+        else:
+            self._reveal(card_bit)
+            self.opponent_hand_size -= 1
+
+        if move & COLLECT_PILE_FLAG:
+            _bits_value_counts(self.board, self.pile_value_counts, 1)
+            self.board = 0
+            self.board_sum = 0
+            return
+
+        captured = (move >> MOVE_CARD_BITS) & FULL_DECK_MASK
+        if captured:
+            self.board ^= captured
+            self.board_sum -= CARD_VALUES[card]  # the captured cards always add up to the value of the card played
+            _bits_value_counts(captured | card_bit, self.pile_value_counts, 1)
+        else:
+            self.board |= card_bit
+            self.board_sum += CARD_VALUES[card]
+
+    def observe_deal(self, hand):
+        """Updates the belief once both players have been dealt a new hand, 'hand' being the one of this player."""
+        self.hand = hand
+        self._reveal(hand)
+        self.opponent_hand_size = HAND_SIZE
+
+    def remaining(self, value):
+        return self.unseen_value_counts[value]
+
+    def opponent_holds_probability(self, value):
+        """Probability that the opponent holds at least one card of 'value', assuming their hand is a uniform draw from the unseen cards."""
+        if not 1 <= value <= MAX_VALUE:
+            return 0.0
+        return _HOLD_PROBABILITY[self.unseen_count][self.unseen_value_counts[value]][self.opponent_hand_size]
+
+    def opponent_scopa_probability(self, board_sum):
+        """Probability that the opponent can clear a board whose values add up to 'board_sum' with a single card."""
+        return self.opponent_holds_probability(board_sum)
+
+    def discard_scopa_probability(self, card):
+        """Probability that the opponent can make a scopa right after this player discards 'card' (a card index)."""
+        return self.opponent_scopa_probability(self.board_sum + CARD_VALUES[card])
+
+    def can_opponent_scopa_after_discard(self, card):
+        return self.discard_scopa_probability(card) > 0
+
+    def card_value_counts(self):
+        """Same content as the 'card_value_counts' entry of the game logs, for the cards in this player's hand."""
+        counts = {}
+        hand = self.hand
+        while hand:
+            low = hand & -hand
+            card = low.bit_length() - 1
+            counts[str(CARDS[card])] = self.pile_value_counts[CARD_VALUES[card]]
+            hand ^= low
+        return counts
+
+
+
+class SafeDiscardPolicy:
+    """
+    Plays a random capture when there is one; otherwise discards the card that leaves the opponent the lowest chance of
+    a scopa, breaking ties at random.
+
+    Keeps one 'BeliefState' per player, brought up to date with 'observe()' / 'observe_deal()' from the moves played
+    since its last decision. It is rebuilt with 'from_state()' only when a new game starts or moves have been undone.
+    """
+
+    def __init__(self):
+        # player -> [state, belief, moves observed, deck position of the next deal, undo count of the state]
+        self.tracked = {}
+
+    def __call__(self, state, moves, rng):
+        if moves[0] & COLLECT_PILE_FLAG or moves[0] >> MOVE_CARD_BITS:
+            return random_policy(state, moves, rng)
+
+        belief = self.belief(state)
+        risks = [belief.discard_scopa_probability(move & MOVE_CARD_MASK) for move in moves]
+        lowest = min(risks)
+        return rng.choice([move for move, risk in zip(moves, risks) if risk == lowest])
+
+    def belief(self, state):
+        """Belief of the current player of 'state', caught up with every move played so far."""
+        player = state.current
+        entry = self.tracked.get(player)
+        if entry is None or entry[0] is not state or entry[4] != state.undo_count:
+            entry = [state, BeliefState.from_state(state, player), state.move_count, state.deck_pos, state.undo_count]
+            self.tracked[player] = entry
+            return entry[1]
+
+        _, belief, observed, deal_pos, _ = entry
+        for i in range(observed, state.move_count):
+            # players alternate, player 1 moving first
+            belief.observe(state.moves[i], i % 2)
+            if not belief.hand and not belief.opponent_hand_size and deal_pos < len(CARDS):
+                dealt = 0
+                for card in state.deck_order[deal_pos + player * HAND_SIZE:deal_pos + (player + 1) * HAND_SIZE]:
+                    dealt |= 1 << card
+                belief.observe_deal(dealt)
+                deal_pos += 2 * HAND_SIZE
+        entry[2], entry[3] = state.move_count, deal_pos
+        return belief
+
+
+safe_discard_policy = SafeDiscardPolicy()
@@ -0,0 +1,243 @@
+from random import Random
+from collections import OrderedDict
+
+from scopa_state import CARDS, CARD_VALUES, DIAMONDS_MASK, SETTE_BELLO_MASK, MOVE_CARD_BITS, MOVE_CARD_MASK, \
+    FULL_DECK_MASK, COLLECT_PILE_FLAG, GameState, mask_value_sum, _bits
+
+
+
+# Cards are abstracted to their value and to whether they are the sette bello or another diamond, the only suit
+# information that matters for scoring. Two positions whose hands and boards hold the same abstract cards have the same
+# legal moves, up to swapping cards of the same abstract kind.
+CARD_TOKENS = [
+    CARD_VALUES[i] * 3 + (2 if (1 << i) & SETTE_BELLO_MASK else 1 if (1 << i) & DIAMONDS_MASK else 0)
+    for i in range(len(CARDS))
+]
+
+# cards of every abstract kind, in deck order
+TOKEN_CARDS = {}
+for _card, _token in enumerate(CARD_TOKENS):
+    TOKEN_CARDS.setdefault(_token, []).append(_card)
+
+SETTE_BELLO = SETTE_BELLO_MASK.bit_length() - 1
+DECK_SIZES_LEFT = range(len(CARDS) - 10, -1, -6)  # cards left in the deck after each deal: 30, 24, ... 0
+
+DEFAULT_MAXSIZE = 100_000
+
+
+def _tokens(mask):
+    tokens = []
+    while mask:
+        low = mask & -mask
+        tokens.append(CARD_TOKENS[low.bit_length() - 1])
+        mask ^= low
+    return tuple(sorted(tokens))
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+def abstract_key(state):
+    """
+    Canonical key of the position the current player is facing: the abstract cards of their hand and of the board,
+    whether they have to collect the pile, whether a scopa is on, and which player leads the pile stats.
+    """
+    own, opp = state.current, 1 - state.current
+    hand, board = state.hands[own], state.board
+    own_pile, opp_pile = state.piles[own], state.piles[opp]
+
+    collect = not state.hands[opp]
+    board_sum = mask_value_sum(board)
+    scopa_possible = not collect and any(CARD_VALUES[low.bit_length() - 1] == board_sum for low in _bits(hand))
+    sette_bello = 1 if own_pile & SETTE_BELLO_MASK else 2 if opp_pile & SETTE_BELLO_MASK else 0
+
+    return (
+        _tokens(hand), _tokens(board), collect, scopa_possible,
+        _sign(own_pile.bit_count() - opp_pile.bit_count()),
+        _sign((own_pile & DIAMONDS_MASK).bit_count() - (opp_pile & DIAMONDS_MASK).bit_count()),
+        sette_bello
+    )
+
+
+def _pile_sizes(pile_cards, count_sign):
+    """(own, opponent) split of 'pile_cards' pile cards that gives the current player the lead 'count_sign' calls for."""
+    if count_sign > 0:
+        return pile_cards // 2 + 1, pile_cards - pile_cards // 2 - 1
+    if count_sign < 0:
+        return (pile_cards - 1) // 2, pile_cards - (pile_cards - 1) // 2
+    return pile_cards // 2, pile_cards // 2
+
+
+def key_position(key, rng):
+    """
+    Concrete position matching the abstract key 'key': the hand and the board get the first cards of their abstract kinds,
+    and everything the key leaves open - which player is moving, how far into the deck the game is, the opponent's hand
+    and the piles - is drawn from 'rng' among the choices consistent with it.
+    """
+    hand_tokens, board_tokens, collect, _, count_sign, diamonds_sign, sette_bello = key
+    free = {token: list(cards) for token, cards in TOKEN_CARDS.items()}
+    hand = [free[token].pop(0) for token in hand_tokens]
+    board = [free[token].pop(0) for token in board_tokens]
+    placed = set(hand + board)
+    diamonds = [card for card in range(len(CARDS)) if (1 << card) & DIAMONDS_MASK and card not in placed and card != SETTE_BELLO]
+    others = [card for card in range(len(CARDS)) if not (1 << card) & DIAMONDS_MASK and card not in placed]
+    sette_bello_unseen = sette_bello == 0 and SETTE_BELLO not in placed
+
+    # players alternate within a round, player 1 first, so the opponent holds as many cards or one fewer; every
+    # round before the current one ended with player 2 collecting the board, which drops the card they played
+    choices = []
+    for current in (0, 1):
+        opp_hand_size = len(hand) - current
+        if (opp_hand_size == 0) != collect or opp_hand_size < 0:
+            continue
+        for rounds_done, deck_left in enumerate(DECK_SIZES_LEFT):
+            pile_cards = len(CARDS) - len(hand) - len(board) - opp_hand_size - deck_left - rounds_done
+            own_size, opp_size = _pile_sizes(pile_cards, count_sign)
+            if min(own_size, opp_size) < 0 or (count_sign == 0 and pile_cards % 2):
+                continue
+            if sette_bello_unseen and not opp_hand_size + deck_left:
+                continue
+            own_dealt, opp_dealt = own_size - (sette_bello == 1), opp_size - (sette_bello == 2)
+            if min(own_dealt, opp_dealt) < 0:
+                continue
+            # diamonds of each pile, besides the sette bello, that give the lead the key calls for
+            for own_diamonds in range(min(own_dealt, len(diamonds)) + 1):
+                for opp_diamonds in range(min(opp_dealt, len(diamonds) - own_diamonds) + 1):
+                    if own_dealt + opp_dealt - own_diamonds - opp_diamonds > len(others):
+                        continue
+                    lead = own_diamonds + (sette_bello == 1) - opp_diamonds - (sette_bello == 2)
+                    if _sign(lead) == diamonds_sign:
+                        choices.append((current, opp_hand_size, deck_left, own_dealt, opp_dealt, own_diamonds, opp_diamonds))
+    assert choices, f"no position matches the key {key}"
+    current, opp_hand_size, deck_left, own_dealt, opp_dealt, own_diamonds, opp_diamonds = rng.choice(choices)
+
+    rng.shuffle(diamonds)
+    rng.shuffle(others)
+    own_pile = [SETTE_BELLO] * (sette_bello == 1) + diamonds[:own_diamonds] + others[:own_dealt - own_diamonds]
+    opp_pile = [SETTE_BELLO] * (sette_bello == 2) + diamonds[own_diamonds:own_diamonds + opp_diamonds] + \
+        others[own_dealt - own_diamonds:own_dealt - own_diamonds + opp_dealt - opp_diamonds]
+    # what is left holds the opponent's hand and the deck, the rest being the cards dropped so far
+    left = diamonds[own_diamonds + opp_diamonds:] + others[own_dealt - own_diamonds + opp_dealt - opp_diamonds:]
+    rng.shuffle(left)
+    unseen_size = opp_hand_size + deck_left - sette_bello_unseen
+    unseen, dropped = left[:unseen_size], left[unseen_size:]
+    if sette_bello_unseen:
+        unseen.insert(rng.randrange(len(unseen) + 1), SETTE_BELLO)
+
+    opp_hand, deck = unseen[:opp_hand_size], unseen[opp_hand_size:]
+    dealt = hand + board + own_pile + opp_pile + dropped + opp_hand
+    position = GameState(dealt + deck)
+    position.deck_pos = len(dealt)
+    position.current = current
+    for cards, owner in ((hand, current), (opp_hand, 1 - current)):
+        position.hands[owner] = sum(1 << card for card in cards)
+    for cards, owner in ((own_pile, current), (opp_pile, 1 - current)):
+        position.piles[owner] = sum(1 << card for card in cards)
+    position.board = sum(1 << card for card in board)
+    return position
+
+
+def abstract_move(move):
+    return (bool(move & COLLECT_PILE_FLAG), CARD_TOKENS[move & MOVE_CARD_MASK], _tokens((move >> MOVE_CARD_BITS) & FULL_DECK_MASK))
+
+
+
+class MemoizedPolicy:
+    """
+    Policy wrapper that calls 'evaluator(state, moves, rng)' once per abstract position (see 'abstract_key()') and
+    replays the abstract move it chose whenever an equivalent position comes up again, in this game or any later one.
+
+    The evaluator never sees the actual position or the game's generator: it gets 'key_position()' of the key, with a
+    generator seeded from the key and 'seed'. The move stored for a key therefore does not depend on which position
+    filled it, and neither does a game depend on which games the same process played before it.
+
+    The memo is an LRU bounded to 'maxsize' positions; 'stats()' reports hits, misses, evictions and the hit rate.
+    """
+
+    def __init__(self, evaluator, maxsize=DEFAULT_MAXSIZE, seed=0):
+        self.evaluator = evaluator
+        self.maxsize = maxsize
+        self.seed = seed
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, state, moves, rng):
+        if len(moves) == 1:
+            return moves[0]
+
+        key = abstract_key(state)
+        action = self.cache.get(key)
+        if action is None:
+            self.misses += 1
+            key_rng = Random(f'{self.seed}:{key}')
+            position = key_position(key, key_rng)
+            action = abstract_move(self.evaluator(position, position.legal_moves(), key_rng))
+            self.cache[key] = action
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+
+        # positions with the same key have the same abstract moves
+        move = next((move for move in moves if abstract_move(move) == action), None)
+        assert move is not None, f"no move of the position matches {action} (key {key})"
+        return move
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.cache),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+
+def determinize(state, rng):
+    """Copy of 'state' where the cards the current player has not seen (opponent's hand and deck) are dealt again at random."""
+    sample = state.copy()
+    opp = 1 - state.current
+    opponent_hand = [low.bit_length() - 1 for low in _bits(state.hands[opp])]
+    unseen = opponent_hand + sample.deck_order[sample.deck_pos:]
+    rng.shuffle(unseen)
+
+    sample.hands[opp] = 0
+    for i in unseen[:len(opponent_hand)]:
+        sample.hands[opp] |= 1 << i
+    sample.deck_order[sample.deck_pos:] = unseen[len(opponent_hand):]
+    return sample
+
+
+def rollout_evaluator(rollouts=16):
+    """
+    Evaluator playing every legal move followed by random play to the end of the game, on 'rollouts' determinized
+    deals shared by all the moves; returns the move with the best average final score difference.
+    """
+    def evaluate(state, moves, rng):
+        player = state.current
+        totals = [0] * len(moves)
+        for _ in range(rollouts):
+            sample = determinize(state, rng)
+            start = sample.move_count
+            for i, move in enumerate(moves):
+                sample.apply(move)
+                while not sample.is_over():
+                    sample.apply(rng.choice(sample.legal_moves()))
+                player_1_score, player_2_score = sample.scores()
+                totals[i] += player_1_score - player_2_score if player == 0 else player_2_score - player_1_score
+                while sample.move_count > start:
+                    sample.undo()
+        return moves[max(range(len(moves)), key=totals.__getitem__)]
+
+    return evaluate
@@ -0,0 +1,349 @@
+from itertools import product
+from random import Random
+from time import perf_counter
+import argparse
+
+from scopa_w_logging import Card, rank_to_numeric_value, suit_full_to_short_name, primiera_score
+
+
+
+# Every card of the deck is given a fixed index (0-39), following the same order in which 'Deck' builds its cards.
+# A set of cards (a hand, the board, a pile) is then a single 40-bit integer with bit 'i' set when card 'i' is in it.
+CARDS = [Card(rank, suit) for rank, suit in product(rank_to_numeric_value.keys(), suit_full_to_short_name.keys())]
+CARD_INDEX = {card: i for i, card in enumerate(CARDS)}
+CARD_VALUES = [card.card_value() for card in CARDS]
+FULL_DECK_MASK = (1 << len(CARDS)) - 1
+
+SETTE_BELLO_MASK = 1 << CARD_INDEX[Card('7', 'diamonds')]
+DIAMONDS_MASK = sum(1 << i for i, card in enumerate(CARDS) if card.suit == 'diamonds')
+SUIT_MASKS = [sum(1 << i for i, card in enumerate(CARDS) if card.suit == suit) for suit in suit_full_to_short_name.keys()]
+VALUE_MASKS = [sum(1 << i for i, value in enumerate(CARD_VALUES) if value == v) for v in range(11)]
+
+# same table as 'calculate_primiera()', indexed by card
+_primiera_values = {
+    '7': 21, '6': 18, 'A': 16, '5': 15, '4': 14, '3': 13, '2': 12,
+    'K': 10, 'J': 10, 'Q': 10
+}
+CARD_PRIMIERA = [_primiera_values[card.rank] for card in CARDS]
+
+# A move is a plain integer, so that generating and applying moves does not create any objects:
+#   bits 0-5  -> index of the card played from the hand
+#   bits 6-45 -> mask of the board cards captured (0 for a discard)
+#   bit 46    -> set for 'collect_pile'
+MOVE_CARD_BITS = 6
+MOVE_CARD_MASK = (1 << MOVE_CARD_BITS) - 1
+COLLECT_PILE_FLAG = 1 << (MOVE_CARD_BITS + len(CARDS))
+
+# A game lasts 36 moves at most (every card not on the initial board is played once)
+MAX_MOVES = len(CARDS) - 4
+
+# Fields saved on the undo stack for every applied move
+_UNDO_FIELDS = 9
+
+
+def cards_to_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << CARD_INDEX[card]
+    return mask
+
+def mask_to_cards(mask):
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(CARDS[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+def mask_value_sum(mask):
+    total = 0
+    while mask:
+        low = mask & -mask
+        total += CARD_VALUES[low.bit_length() - 1]
+        mask ^= low
+    return total
+
+
+def move_card(move):
+    return move & MOVE_CARD_MASK
+
+def move_captured(move):
+    return (move >> MOVE_CARD_BITS) & FULL_DECK_MASK
+
+def move_is_collect(move):
+    return bool(move & COLLECT_PILE_FLAG)
+
+def move_to_action(move):
+    """Translates a move back into the 'available_actions()' vocabulary ('discard', 'collect_pile' or (card, captured_cards))."""
+    if move & COLLECT_PILE_FLAG:
+        return 'collect_pile'
+    captured = move_captured(move)
+    if not captured:
+        return 'discard'
+    return (CARDS[move_card(move)], mask_to_cards(captured))
+
+
+def primiera_from_mask(pile_mask):
+    """Mask-based equivalent of 'calculate_primiera()' - returns (primiera_sum, suits_covered)."""
+    primiera_sum = 0
+    suits_covered = 0
+    for suit_mask in SUIT_MASKS:
+        cards = pile_mask & suit_mask
+        if not cards:
+            continue
+        suits_covered += 1
+        best = 0
+        while cards:
+            low = cards & -cards
+            best = max(best, CARD_PRIMIERA[low.bit_length() - 1])
+            cards ^= low
+        primiera_sum += best
+    return primiera_sum, suits_covered
+
+
+
+class GameState:
+    """
+    Single mutable game of Scopa, following the same rules as 'scopa_w_logging.game()'.
+
+    Hands, board and piles are 40-bit masks and moves are integers, so 'apply()' and 'undo()' only update a handful of
+    ints. Every 'apply()' pushes the previous state onto an undo stack that is allocated once, for the longest possible game.
+    """
+
+    def __init__(self, deck_order):
+        assert len(deck_order) == len(CARDS), "the deck order needs to contain every card exactly once"
+        self.deck_order = list(deck_order)
+        self.hands = [0, 0]
+        self.piles = [0, 0]
+        self.scopas = [0, 0]
+        self.board = 0
+        self.deck_pos = 0
+        self.current = 0  # 0 -> player 1, 1 -> player 2
+        self.move_count = 0
+        self._undo_stack = [0] * (MAX_MOVES * _UNDO_FIELDS)
+        self.moves = [0] * MAX_MOVES  # moves played so far are 'moves[:move_count]'
+        self.undo_count = 0  # lets observers of the move history tell when it has been rewound
+
+        # same dealing order as 'game()': the board first, then player 1, then player 2
+        self.board = self._deal(4)
+        self.hands[0] = self._deal(3)
+        self.hands[1] = self._deal(3)
+
+    @classmethod
+    def random(cls, rng=None):
+        rng = rng or Random()
+        order = list(range(len(CARDS)))
+        rng.shuffle(order)
+        return cls(order)
+
+    @classmethod
+    def seeded(cls, seed, game_id):
+        """Deal of game 'game_id' of a run seeded with 'seed', along with the generator to keep using for its moves."""
+        rng = game_rng(seed, game_id)
+        return cls.random(rng), rng
+
+    def copy(self):
+        other = GameState.__new__(GameState)
+        other.deck_order = list(self.deck_order)
+        other.hands = list(self.hands)
+        other.piles = list(self.piles)
+        other.scopas = list(self.scopas)
+        other.board = self.board
+        other.deck_pos = self.deck_pos
+        other.current = self.current
+        other.move_count = self.move_count
+        other._undo_stack = list(self._undo_stack)
+        other.moves = list(self.moves)
+        other.undo_count = self.undo_count
+        return other
+
+    def _deal(self, cards_no):
+        mask = 0
+        for i in self.deck_order[self.deck_pos:self.deck_pos + cards_no]:
+            mask |= 1 << i
+        self.deck_pos += cards_no
+        return mask
+
+    def is_over(self):
+        return not (self.hands[0] or self.hands[1]) and self.deck_pos == len(CARDS)
+
+    def legal_moves(self):
+        """Moves available to the current player, mirroring 'PlayerAction.available_actions()'."""
+        hand = self.hands[self.current]
+
+        # when the opponent has run out of cards, the only option is to play a card and collect the whole board
+        if not self.hands[1 - self.current]:
+            return [COLLECT_PILE_FLAG | (low.bit_length() - 1) for low in _bits(hand)]
+
+        moves = []
+        board = self.board
+        if board:
+            # value of every non-empty subset of the board; submasks are visited in increasing order, so the sum of
+            # 'sub' with its lowest card removed has always been computed already
+            sums = {0: 0}
+            by_value = [[] for _ in range(11)]
+            sub = (0 - board) & board
+            while sub:
+                low = sub & -sub
+                total = sums[sub ^ low] + CARD_VALUES[low.bit_length() - 1]
+                sums[sub] = total
+                if total <= 10:
+                    by_value[total].append(sub)
+                sub = (sub - board) & board
+
+            for low in _bits(hand):
+                card = low.bit_length() - 1
+                for captured in by_value[CARD_VALUES[card]]:
+                    moves.append(card | (captured << MOVE_CARD_BITS))
+
+        # if there are no capture options, any card of the hand can be discarded
+        if not moves:
+            return [low.bit_length() - 1 for low in _bits(hand)]
+        return moves
+
+    def apply(self, move):
+        player = self.current
+        stack = self._undo_stack
+        base = self.move_count * _UNDO_FIELDS
+        stack[base] = self.hands[0]
+        stack[base + 1] = self.hands[1]
+        stack[base + 2] = self.board
+        stack[base + 3] = self.piles[0]
+        stack[base + 4] = self.piles[1]
+        stack[base + 5] = self.scopas[0]
+        stack[base + 6] = self.scopas[1]
+        stack[base + 7] = self.deck_pos
+        stack[base + 8] = player
+        self.moves[self.move_count] = move
+        self.move_count += 1
+
+        card_bit = 1 << (move & MOVE_CARD_MASK)
+        self.hands[player] ^= card_bit
+
+        if move & COLLECT_PILE_FLAG:
+            # as in 'game()', only the board goes to the pile - the card played is not added to it
+            self.piles[player] |= self.board
+            self.board = 0
+        else:
+            captured = (move >> MOVE_CARD_BITS) & FULL_DECK_MASK
+            if captured:
+                if captured == self.board:  # Scopa condition
+                    self.scopas[player] += 1
+                self.board ^= captured
+                self.piles[player] |= captured | card_bit
+            else:
+                self.board |= card_bit
+
+        self.current = 1 - player
+
+        # new hands are dealt as soon as both players have run out of cards
+        if not (self.hands[0] or self.hands[1]) and self.deck_pos < len(CARDS):
+            self.hands[0] = self._deal(3)
+            self.hands[1] = self._deal(3)
+
+    def undo(self):
+        assert self.move_count > 0, "no moves to undo"
+        self.move_count -= 1
+        self.undo_count += 1
+        stack = self._undo_stack
+        base = self.move_count * _UNDO_FIELDS
+        self.hands[0] = stack[base]
+        self.hands[1] = stack[base + 1]
+        self.board = stack[base + 2]
+        self.piles[0] = stack[base + 3]
+        self.piles[1] = stack[base + 4]
+        self.scopas[0] = stack[base + 5]
+        self.scopas[1] = stack[base + 6]
+        self.deck_pos = stack[base + 7]
+        self.current = stack[base + 8]
+
+    def score_components(self):
+        """
+        Points of both players broken down as at the end of 'game()': one (cards, sette bello, diamonds, primiera, scopas)
+        tuple per player, where every item but the scopas is 0 or 1.
+        """
+        p1_pile, p2_pile = self.piles
+        p1_count, p2_count = p1_pile.bit_count(), p2_pile.bit_count()
+        p1_diamonds, p2_diamonds = (p1_pile & DIAMONDS_MASK).bit_count(), (p2_pile & DIAMONDS_MASK).bit_count()
+
+        player_1_primiera, player_1_suits = primiera_from_mask(p1_pile)
+        player_2_primiera, player_2_suits = primiera_from_mask(p2_pile)
+        p1_primiera_score, p2_primiera_score = primiera_score(player_1_suits, player_2_suits, player_1_primiera, player_2_primiera)
+
+        return (
+            (int(p1_count > p2_count), int(bool(p1_pile & SETTE_BELLO_MASK)), int(p1_diamonds > p2_diamonds),
+             int(p1_primiera_score > p2_primiera_score), self.scopas[0]),
+            (int(p2_count > p1_count), int(bool(p2_pile & SETTE_BELLO_MASK)), int(p2_diamonds > p1_diamonds),
+             int(p2_primiera_score > p1_primiera_score), self.scopas[1])
+        )
+
+    def scores(self):
+        """Final scores of both players, computed the same way as at the end of 'game()'."""
+        player_1_components, player_2_components = self.score_components()
+        return sum(player_1_components), sum(player_2_components)
+
+
+def game_rng(seed, game_id):
+    # each game gets its own generator, so that results do not depend on how games are split across workers
+    return Random(seed * 1_000_003 + game_id)
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low
+        mask ^= low
+
+
+def random_policy(state, moves, rng):
+    return rng.choice(moves)
+
+
+def play_game(state, policy=random_policy, rng=None):
+    """Plays 'state' to the end with 'policy(state, moves, rng)' choosing every move; returns the moves played."""
+    rng = rng or Random()
+    played = []
+    while not state.is_over():
+        move = policy(state, state.legal_moves(), rng)
+        state.apply(move)
+        played.append(move)
+    return played
+
+
+
+def bench_apply_undo(games=2000, seed=0):
+    """
+    Measures apply+undo throughput: every game is played out once to record its moves, then the whole game is replayed
+    and rewound repeatedly on the same state object. Returns the number of apply+undo cycles per second.
+    """
+    rng = Random(seed)
+    recorded = []
+    for _ in range(games):
+        state = GameState.random(rng)
+        recorded.append((state, play_game(state, rng=rng)))
+        while state.move_count:
+            state.undo()
+
+    cycles = 0
+    start = perf_counter()
+    for state, moves in recorded:
+        for _ in range(10):
+            for move in moves:
+                state.apply(move)
+            for _ in moves:
+                state.undo()
+        cycles += 10 * len(moves)
+    elapsed = perf_counter() - start
+
+    return cycles / elapsed
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark apply/undo on the mask-based Scopa game state.')
+    parser.add_argument('--games', type=int, default=2000, help='Number of random games to replay')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random deals and moves')
+    args = parser.parse_args()
+
+    moves_per_sec = bench_apply_undo(games=args.games, seed=args.seed)
+    print(f'{moves_per_sec:,.0f} apply+undo cycles/sec')
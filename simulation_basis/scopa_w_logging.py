@@ -115,9 +115,13 @@ class PlayerPile:
     def __init__(self):
         self.cards = []
         self.scopas = 0
+        # number of pile cards of every 'card_value()', kept up to date so that logging does not have to rescan the pile
+        self.value_counts = [0] * (max(rank_to_numeric_value.values()) + 1)
 
     def add_cards_to_pile(self, cards):
         self.cards += cards
+        for card in cards:
+            self.value_counts[card.card_value()] += 1
 
     def pile_count(self):
         return len(self.cards)
@@ -222,7 +226,7 @@ def calculate_primiera(pile):
 
 
 
-def game(instance_id=0):  #log_file='game_logs.json'):
+def game(instance_id=0, log_dir='logs'):
 
     deck = Deck()
     player_1 = Player(idvalue=1)
@@ -255,7 +259,7 @@ def game(instance_id=0):  #log_file='game_logs.json'):
             card_value_counts = {}
             for card in player_1_hand.cards:
                 value = card.card_value()
-                current_count = sum(1 for c in player_1_pile.cards if c.card_value() == value) + sum(1 for c in player_2_pile.cards if c.card_value() == value) 
+                current_count = player_1_pile.value_counts[value] + player_2_pile.value_counts[value]
                 card_value_counts[str(card)] = current_count
             #LOGGING
             action_details['player'] = 1
@@ -299,7 +303,7 @@ def game(instance_id=0):  #log_file='game_logs.json'):
             card_value_counts = {}
             for card in player_1_hand.cards:
                 value = card.card_value()
-                current_count = sum(1 for c in player_1_pile.cards if c.card_value() == value) + sum(1 for c in player_2_pile.cards if c.card_value() == value) 
+                current_count = player_1_pile.value_counts[value] + player_2_pile.value_counts[value]
                 card_value_counts[str(card)] = current_count
             action_details['card_value_counts'] = card_value_counts
             #LOGGING
@@ -394,7 +398,7 @@ def game(instance_id=0):  #log_file='game_logs.json'):
     action_details['final_player_2_score'] = player_2_score
     game_log.append(action_details)
 
-    log_file = f'logs/game_logs_{instance_id}.json'
+    log_file = os.path.join(log_dir, f'game_logs_{instance_id}.json')
     with open(log_file, 'w') as f:
         json.dump(game_log, f, indent=4)
 
@@ -442,9 +446,10 @@ def game(instance_id=0):  #log_file='game_logs.json'):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run a Scopa game simulation.')
     parser.add_argument('--instance_id', type=int, default=0, help='Unique game instance ID')
+    parser.add_argument('--log_dir', type=str, default='logs', help='Directory the game log is written to')
     args = parser.parse_args()
     
-    game(instance_id=args.instance_id)
+    game(instance_id=args.instance_id, log_dir=args.log_dir)
 
 
 
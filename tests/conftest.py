@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The simulation, execution and analysis scripts import each other as top-level modules
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for name in ('simulation_basis', 'execution', 'analysis'):
+    sys.path.insert(0, os.path.join(repo_dir, name))
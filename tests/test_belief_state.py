@@ -0,0 +1,64 @@
+import pytest
+
+from scopa_w_logging import Card
+from scopa_state import GameState, CARD_INDEX, cards_to_mask
+from belief_state import BeliefState, SafeDiscardPolicy
+
+_FIELDS = ('hand', 'board', 'board_sum', 'unseen', 'unseen_count', 'opponent_hand_size', 'unseen_value_counts', 'pile_value_counts')
+
+
+def _fields(belief):
+    return {name: getattr(belief, name) for name in _FIELDS}
+
+
+def test_incremental_belief_matches_from_state():
+    policy = SafeDiscardPolicy()
+    checked = 0
+    for game_id in range(2000):
+        state, rng = GameState.seeded(7, game_id)
+        while not state.is_over():
+            move = policy(state, state.legal_moves(), rng)
+            # beliefs are only caught up at the decisions that need them (discards)
+            entry = policy.tracked.get(state.current)
+            if entry is not None and entry[0] is state and entry[2] == state.move_count:
+                assert _fields(entry[1]) == _fields(BeliefState.from_state(state, state.current))
+                checked += 1
+            state.apply(move)
+    assert checked > 10000
+
+
+def test_belief_is_rebuilt_after_undo():
+    policy = SafeDiscardPolicy()
+    state, rng = GameState.seeded(7, 0)
+    while state.move_count < 12:
+        state.apply(policy(state, state.legal_moves(), rng))
+    state.undo()
+    state.undo()
+    state.apply(state.legal_moves()[-1])
+    belief = policy.belief(state)
+    assert _fields(belief) == _fields(BeliefState.from_state(state, state.current))
+
+
+def test_known_probabilities():
+    hand = [Card('3', 'hearts'), Card('K', 'hearts'), Card('Q', 'hearts')]
+    board = [Card('A', 'hearts'), Card('A', 'spades'), Card('2', 'hearts'), Card('2', 'spades')]
+    belief = BeliefState(0, cards_to_mask(hand), cards_to_mask(board))
+
+    # 33 unseen cards, 3 of them in the opponent's hand
+    assert belief.unseen_count == 33
+    assert belief.remaining(5) == 4
+    assert belief.opponent_holds_probability(5) == pytest.approx(1802 / 5456)  # 1 - C(29, 3) / C(33, 3)
+    assert belief.opponent_holds_probability(11) == 0.0
+
+    # the board adds up to 6: discarding the 3 leaves 9, with three queens unseen
+    assert belief.discard_scopa_probability(CARD_INDEX[Card('3', 'hearts')]) == pytest.approx(1396 / 5456)  # 1 - C(30, 3) / C(33, 3)
+    # a board adding up to more than 10 can not be cleared by a single card
+    assert belief.discard_scopa_probability(CARD_INDEX[Card('K', 'hearts')]) == 0.0
+    assert not belief.can_opponent_scopa_after_discard(CARD_INDEX[Card('K', 'hearts')])
+
+    # the opponent discards two fives: one card left in their hand, drawn from 31 unseen cards holding two fives
+    for card in (Card('5', 'hearts'), Card('5', 'spades')):
+        belief.observe(CARD_INDEX[card], 1)
+    assert (belief.opponent_hand_size, belief.unseen_count, belief.remaining(5)) == (1, 31, 2)
+    assert belief.opponent_holds_probability(5) == pytest.approx(2 / 31)
+    assert belief.board_sum == 16
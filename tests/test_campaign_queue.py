@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import time
+import subprocess
+
+from batch_simulation import simulate_games
+import campaign_queue
+from campaign_queue import init_campaign, claim_shard, requeue_stale_claims, run_coordinator
+
+QUEUE_SCRIPT = os.path.join(os.path.dirname(__file__), '../execution/campaign_queue.py')
+
+
+def test_workers_and_coordinator_complete_a_campaign(tmp_path):
+    queue_dir = str(tmp_path / 'campaign')
+    shards = init_campaign(queue_dir, 5000, seed=1, shard_games=500)
+    assert len(shards) == 10
+
+    # a worker that died right after claiming a shard
+    dead_claim = claim_shard(queue_dir, 'dead-worker')
+    stale = time.time() - 3600
+    os.utime(dead_claim, (stale, stale))
+
+    workers = [
+        subprocess.Popen([sys.executable, QUEUE_SCRIPT, 'worker', f'--queue_dir={queue_dir}', f'--worker_id=w{i}', '--processes=1'],
+                         stdout=subprocess.DEVNULL)
+        for i in range(3)
+    ]
+    try:
+        summary = run_coordinator(queue_dir, stale_after=5, poll_interval=0.1)
+        for worker in workers:
+            assert worker.wait(60) == 0
+    finally:
+        for worker in workers:
+            worker.kill()
+
+    assert summary['results'] == simulate_games(0, 5000, 1)
+    assert 'dead-worker' not in summary['shards_per_worker']
+    assert sum(summary['shards_per_worker'].values()) == 10
+    assert os.listdir(os.path.join(queue_dir, 'claimed')) == []
+    with open(os.path.join(queue_dir, 'summary.json'), 'r') as f:
+        assert json.load(f)['results']['games'] == 5000
+
+
+def test_fresh_claim_is_not_requeued(tmp_path, monkeypatch):
+    queue_dir = str(tmp_path / 'campaign')
+    init_campaign(queue_dir, 100, shard_games=50)
+    stale = time.time() - 3600
+    for shard in os.listdir(os.path.join(queue_dir, 'pending')):
+        os.utime(os.path.join(queue_dir, 'pending', shard), (stale, stale))
+
+    # the coordinator scans the claims right after the rename (a single time - it renames too)
+    requeued = []
+    rename = os.rename
+
+    def rename_then_scan(source, destination):
+        rename(source, destination)
+        monkeypatch.setattr(campaign_queue.os, 'rename', rename)
+        requeued.extend(requeue_stale_claims(queue_dir, stale_after=5))
+
+    monkeypatch.setattr(campaign_queue.os, 'rename', rename_then_scan)
+    claim = claim_shard(queue_dir, 'w0')
+    assert requeued == []
+    assert os.path.exists(claim)
@@ -0,0 +1,21 @@
+import pytest
+
+from pyscopa import cli
+
+
+def test_outside_a_checkout_stops_with_a_message(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, 'REPO_DIR', str(tmp_path))
+    with pytest.raises(SystemExit, match='source checkout'):
+        cli.main(['analyze', '--logs_dir', str(tmp_path)])
+
+
+def test_analyze_summarizes_the_shipped_logs(capsys):
+    cli.main(['analyze'])
+    assert '"games": 100' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('games', ['0', '-5'])
+def test_simulate_needs_a_positive_number_of_games(games, capsys):
+    with pytest.raises(SystemExit):
+        cli.main(['simulate', '--games', games])
+    assert 'not a positive integer' in capsys.readouterr().err
@@ -0,0 +1,68 @@
+import os
+import json
+import shutil
+
+import pytest
+
+import compact_logs as compact_logs_module
+from compact_logs import compact_logs, iter_compacted
+
+LOGS_DIR = os.path.join(os.path.dirname(__file__), '../logs')
+
+
+def _read(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def test_round_trip_keeps_missing_analyses_and_null_logs(tmp_path):
+    logs_dir = tmp_path / 'logs'
+    logs_dir.mkdir()
+    for instance_id in range(5):
+        for name in (f'game_logs_{instance_id}.json', f'game_{instance_id}_analysis.json'):
+            shutil.copy(os.path.join(LOGS_DIR, name), logs_dir / name)
+    # a game whose analysis was never written, and one that never completed ('initialize_game_log()' leaves 'null')
+    os.remove(logs_dir / 'game_3_analysis.json')
+    (logs_dir / 'game_logs_7.json').write_text('null')
+
+    expected = {}
+    for instance_id in (0, 1, 2, 3, 4, 7):
+        analysis_path = logs_dir / f'game_{instance_id}_analysis.json'
+        expected[instance_id] = (_read(logs_dir / f'game_logs_{instance_id}.json'),
+                                 _read(analysis_path) if analysis_path.exists() else None)
+
+    out_dir = str(tmp_path / 'compact')
+    manifest = compact_logs(str(logs_dir), out_dir, games_per_shard=4, processes=1, delete_originals=True)
+    assert manifest['games'] == 6
+    assert manifest['source_files'] == 10
+    assert os.listdir(logs_dir) == []
+
+    restored = {instance_id: (game_log, analysis) for instance_id, game_log, analysis in iter_compacted(out_dir)}
+    assert restored == expected
+    assert restored[3][1] is None
+    assert restored[7] == (None, None)
+
+
+def test_refuses_a_directory_compacted_before(tmp_path):
+    logs_dir = tmp_path / 'logs'
+    logs_dir.mkdir()
+    shutil.copy(os.path.join(LOGS_DIR, 'game_logs_0.json'), logs_dir / 'game_logs_0.json')
+    out_dir = str(tmp_path / 'compact')
+    compact_logs(str(logs_dir), out_dir, processes=1, delete_originals=True)
+
+    with pytest.raises(FileExistsError):
+        compact_logs(str(logs_dir), out_dir, processes=1)
+    assert [instance_id for instance_id, _, _ in iter_compacted(out_dir)] == [0]
+
+
+def test_failed_verification_keeps_the_originals(tmp_path, monkeypatch):
+    logs_dir = tmp_path / 'logs'
+    logs_dir.mkdir()
+    for name in ('game_logs_0.json', 'game_0_analysis.json'):
+        shutil.copy(os.path.join(LOGS_DIR, name), logs_dir / name)
+    # a shard that reads back without its analysis (the pool workers are forked, so they see the patch)
+    monkeypatch.setattr(compact_logs_module, 'expand_record', lambda record: (record['instance_id'], record['game_log'], None))
+
+    with pytest.raises(RuntimeError, match='read back'):
+        compact_logs(str(logs_dir), str(tmp_path / 'compact'), processes=1, delete_originals=True)
+    assert sorted(os.listdir(logs_dir)) == ['game_0_analysis.json', 'game_logs_0.json']
@@ -0,0 +1,73 @@
+import numpy as np
+
+from scopa_state import GameState, random_policy, CARDS, MOVE_CARD_BITS, MOVE_CARD_MASK, FULL_DECK_MASK
+from feature_extraction import (FEATURE_WIDTH, ACTION_WIDTH, MASK_COLUMNS, STAT_COLUMNS, decision_point, move_kind,
+                                generate_dataset, load_shards)
+
+
+def _bits(mask):
+    return [(mask >> i) & 1 for i in range(len(CARDS))]
+
+
+def _expected_rows(games, seed):
+    """
+    Rows of games 0 to 'games' - 1 built one at a time with 'decision_point()', in the order the workers write them,
+    along with the number of rows of every game.
+    """
+    features, actions, labels, lengths = [], [], [], []
+    for game_id in range(games):
+        state, rng = GameState.seeded(seed, game_id)
+        players = []
+        while not state.is_over():
+            point = decision_point(state)
+            features.append(sum((_bits(mask) for mask in point[:len(MASK_COLUMNS)]), []) + list(point[len(MASK_COLUMNS):]))
+            players.append(state.current)
+            move = random_policy(state, state.legal_moves(), rng)
+            actions.append([move & MOVE_CARD_MASK, move_kind(move)] + _bits((move >> MOVE_CARD_BITS) & FULL_DECK_MASK))
+            state.apply(move)
+        player_1_score, player_2_score = state.scores()
+        labels += [(player_1_score - player_2_score) * (1 if player == 0 else -1) for player in players]
+        lengths.append(len(players))
+    return np.array(features), np.array(actions), np.array(labels), lengths
+
+
+def test_dataset_matches_decision_points(tmp_path):
+    out_dir = str(tmp_path / 'features')
+    manifest = generate_dataset(out_dir, 6, seed=5, workers=2, shard_rows=40)
+    expected_features, expected_actions, expected_labels, lengths = _expected_rows(6, seed=5)
+
+    shards = list(load_shards(out_dir))
+    assert len(shards) == len(manifest['shards']) > 2
+    assert manifest['rows'] == len(expected_labels) == sum(shard['rows'] for shard in manifest['shards'])
+    assert len(manifest['feature_columns']) == FEATURE_WIDTH
+    assert len(manifest['action_columns']) == ACTION_WIDTH
+
+    for (features, actions, labels), shard in zip(shards, manifest['shards']):
+        assert all(isinstance(array, np.memmap) for array in (features, actions, labels))
+        assert features.shape == (shard['rows'], FEATURE_WIDTH)
+        assert actions.shape == (shard['rows'], ACTION_WIDTH)
+        assert labels.shape == (shard['rows'],)
+
+    features = np.concatenate([shard[0] for shard in shards])
+    actions = np.concatenate([shard[1] for shard in shards])
+    labels = np.concatenate([shard[2] for shard in shards])
+    assert np.array_equal(features, expected_features)
+    assert np.array_equal(actions, expected_actions)
+    assert np.array_equal(labels, expected_labels)
+
+    # within a game every row holds the same score difference, with its sign flipped for player 2
+    player = features[:, len(MASK_COLUMNS) * len(CARDS) + STAT_COLUMNS.index('player')]
+    start = 0
+    for length in lengths:
+        game_labels, game_players = labels[start:start + length].astype(int), player[start:start + length]
+        assert set(game_players) == {0, 1}
+        assert len(set(game_labels * np.where(game_players == 0, 1, -1))) == 1
+        start += length
+    assert np.any(labels != 0)
+
+
+def test_zero_games_write_an_empty_manifest(tmp_path):
+    out_dir = str(tmp_path / 'features')
+    manifest = generate_dataset(out_dir, 0)
+    assert manifest['rows'] == 0
+    assert list(load_shards(out_dir)) == []
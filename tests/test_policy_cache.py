@@ -0,0 +1,39 @@
+from random import Random
+
+from scopa_state import GameState, random_policy
+from policy_cache import MemoizedPolicy, abstract_key, key_position
+
+
+def _play(policy, game_ids, seed=3):
+    games = []
+    for game_id in game_ids:
+        state, rng = GameState.seeded(seed, game_id)
+        while not state.is_over():
+            state.apply(policy(state, state.legal_moves(), rng))
+        games.append(state.moves[:state.move_count])
+    return games
+
+
+def test_memoized_games_do_not_depend_on_earlier_games():
+    # a cheap evaluator drawing from the rng it is given, so that a choice depending on the position or generator
+    # that filled the memo would show up right away
+    alone_policy = MemoizedPolicy(random_policy)
+    alone = _play(alone_policy, range(30, 40))
+
+    policy = MemoizedPolicy(random_policy)
+    _play(policy, range(30))
+    hits_before = policy.stats()['hits']
+    assert _play(policy, range(30, 40)) == alone
+    # positions filled in by games 0-29 are hits for games 30-39
+    assert policy.stats()['hits'] - hits_before > alone_policy.stats()['hits']
+
+
+def test_key_position_matches_its_key():
+    for game_id in range(50):
+        state, rng = GameState.seeded(4, game_id)
+        while not state.is_over():
+            key = abstract_key(state)
+            position = key_position(key, Random(game_id))
+            assert abstract_key(position) == key
+            assert sorted(position.deck_order) == list(range(len(position.deck_order)))
+            state.apply(rng.choice(state.legal_moves()))
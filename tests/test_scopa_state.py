@@ -0,0 +1,84 @@
+import json
+import random
+
+from scopa_w_logging import Card, Hand, PlayerAction, game
+from scopa_state import GameState, CARD_INDEX, COLLECT_PILE_FLAG, MOVE_CARD_BITS, cards_to_mask, mask_to_cards, move_to_action
+
+
+def _snapshot(state):
+    return (tuple(state.hands), tuple(state.piles), tuple(state.scopas), state.board, state.deck_pos, state.current,
+            state.move_count, state.moves[:state.move_count])
+
+
+def _actions(actions):
+    """Actions as a set of combinations: the order of the captured cards does not matter."""
+    return {action if isinstance(action, str) else (action[0], frozenset(action[1])) for action in actions}
+
+
+def _card(name):
+    rank, suit = name.split(' of ')
+    return Card(rank, suit)
+
+
+def test_undo_restores_every_ply():
+    rng = random.Random(0)
+    for _ in range(300):
+        state = GameState.random(rng)
+        history = []
+        while not state.is_over():
+            before = _snapshot(state)
+            for move in state.legal_moves():
+                state.apply(move)
+                state.undo()
+                assert _snapshot(state) == before
+            history.append(before)
+            state.apply(rng.choice(state.legal_moves()))
+
+        while history:
+            state.undo()
+            assert _snapshot(state) == history.pop()
+
+
+def test_legal_moves_match_available_actions():
+    rng = random.Random(1)
+    for _ in range(300):
+        state = GameState.random(rng)
+        while not state.is_over():
+            player = state.current
+            expected = PlayerAction(player + 1, Hand(mask_to_cards(state.hands[player])), Hand(mask_to_cards(state.board)),
+                                    Hand(mask_to_cards(state.hands[1 - player]))).available_actions()
+            moves = state.legal_moves()
+            assert _actions(move_to_action(move) for move in moves) == _actions(expected)
+            state.apply(rng.choice(moves))
+
+
+def test_replaying_game_gives_its_boards_and_scores(tmp_path):
+    for instance_id in range(50):
+        random.seed(instance_id)
+        game(instance_id, log_dir=str(tmp_path))
+        with open(tmp_path / f'game_logs_{instance_id}.json', 'r') as f:
+            game_log = json.load(f)
+        # the last entry repeats the last move, along with the final scores
+        moves, final = game_log[:-1], game_log[-1]
+
+        # the deck order is the board, then the hands of player 1 and player 2 of every round, as they were dealt
+        deck_order = [CARD_INDEX[_card(name)] for name in moves[0]['board_before']]
+        for i, action in enumerate(moves):
+            if action['player'] == 1 and len(action['hand']) == 3:
+                deck_order += [CARD_INDEX[_card(name)] for name in action['hand'] + moves[i + 1]['hand']]
+        state = GameState(deck_order)
+
+        for action in moves:
+            assert state.current == action['player'] - 1
+            card = CARD_INDEX[_card(action['card_played'])]
+            if action['action'] == 'collect_pile':
+                move = COLLECT_PILE_FLAG | card
+            else:
+                move = card | (cards_to_mask(map(_card, action.get('captured_cards', []))) << MOVE_CARD_BITS)
+            assert move in state.legal_moves()
+            state.apply(move)
+            assert state.board == cards_to_mask(map(_card, action['board_after']))
+            assert list(state.scopas) == [action['running_player_1_scopas'], action['running_player_2_scopas']]
+
+        assert state.is_over()
+        assert state.scores() == (final['final_player_1_score'], final['final_player_2_score'])
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from batch_simulation import simulate_games
+from shared_results import ResultRings, run_shared
+
+
+def test_totals_match_simulate_games():
+    totals = run_shared(300, seed=2, workers=2, capacity=16)
+    expected = simulate_games(0, 300, seed=2)
+    assert {field: totals[field] for field in expected} == expected
+
+
+def test_failing_consumer_does_not_hang():
+    def on_records(view):
+        raise ValueError('consumer failed')
+
+    start = time.perf_counter()
+    # far more games than the rings hold, so the workers are left waiting on full rings
+    with pytest.raises(ValueError, match='consumer failed'):
+        run_shared(2000, workers=2, capacity=8, on_records=on_records)
+    assert time.perf_counter() - start < 30
+
+
+def test_records_that_have_not_fully_arrived_are_left_for_later():
+    rings = ResultRings(1, capacity=4)
+    try:
+        for game_id in range(3):
+            rings.push(0, (0, game_id, 1, 2) + (0,) * 10 + (20,))
+        [pending] = rings.pending_views(0)
+        assert rings.verified_count(pending, 0) == 3
+
+        # the head has moved, but the bytes of the second record are not there yet
+        pending[1]['p2_score'] = 0
+        assert rings.verified_count(pending, 0) == 1
+        # a slot still holding a record of the previous lap
+        pending[1]['p2_score'] = 2
+        assert rings.verified_count(pending, 4) == 0
+    finally:
+        rings.close()
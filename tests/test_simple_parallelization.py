@@ -0,0 +1,23 @@
+import os
+import json
+
+import simple_parallelization
+from telemetry import AppendingLogWriter
+
+
+def test_imported_pipeline_runs_without_setup(tmp_path, monkeypatch):
+    logs_dir = str(tmp_path / 'logs') + os.sep
+    monkeypatch.setattr(simple_parallelization, 'GAME_LOGS_DIR', logs_dir)
+    monkeypatch.setattr(simple_parallelization, 'NITEMS', 3)
+    monkeypatch.setattr(simple_parallelization, 'simulation_log', AppendingLogWriter(str(tmp_path / 'simulation.log')))
+
+    # the default telemetry is never started, but still counts
+    games_before = simple_parallelization.telemetry.games
+    simple_parallelization.simulation()
+    simple_parallelization.analysis()
+
+    assert simple_parallelization.telemetry.games - games_before == 3
+    assert (tmp_path / 'simulation.log').read_text().count('completed successfully') == 3
+    for instance_id in range(3):
+        with open(os.path.join(logs_dir, f'game_{instance_id}_analysis.json'), 'r') as f:
+            assert json.load(f)[0]['instance_id'] == instance_id
@@ -0,0 +1,78 @@
+import json
+import socket
+import asyncio
+import threading
+
+import pytest
+
+from batch_simulation import simulate_games
+from simulation_service import SimulationService, submit_job
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = SimulationService(port=0, workers=2, chunk_games=20)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def serve():
+        await service.start()
+        ready.set()
+        try:
+            await service.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    task = loop.create_task(serve())
+    thread = threading.Thread(target=loop.run_until_complete, args=(task,), daemon=True)
+    thread.start()
+    assert ready.wait(60), "the service did not start"
+    yield service
+
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(10)
+    loop.run_until_complete(service.close())
+    loop.close()
+
+
+def _raw_request(port, request):
+    with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+        sock.sendall(request)
+        response = b''
+        while chunk := sock.recv(4096):
+            response += chunk
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_job_matches_direct_simulation(service):
+    progress = []
+    results = submit_job(50, seed=3, policies=('safe_discard', 'random'), port=service.port, on_progress=progress.append)
+    assert results == simulate_games(0, 50, 3, ('safe_discard', 'random'))
+    assert progress[-1]['games_done'] == 50
+
+
+@pytest.mark.parametrize('body', [
+    b'[1, 2]',
+    b'{"games": 0}',
+    b'{"games": "10"}',
+    b'{"games": 1000000000}',
+    b'{"policies": [[1], 2]}',
+    b'{"policies": ["random", "nope"]}',
+    b'{not json',
+])
+def test_invalid_jobs_are_rejected(service, body):
+    request = b'POST /jobs HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body
+    status, payload = _raw_request(service.port, request)
+    assert status == 400
+    assert payload['error']
+
+
+def test_invalid_content_length_is_rejected(service):
+    status, payload = _raw_request(service.port, b'POST /jobs HTTP/1.1\r\nContent-Length: abc\r\n\r\n')
+    assert status == 400
+
+
+def test_rejected_job_raises_on_the_client(service):
+    with pytest.raises(RuntimeError, match='unknown policy'):
+        submit_job(10, policies=('random', 'nope'), port=service.port)
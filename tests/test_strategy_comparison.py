@@ -0,0 +1,50 @@
+import math
+from random import Random
+
+import pytest
+
+from strategy_comparison import METHODS, STRATA, BOARD_CARDS, HAND_CARDS, antithetic_deal, compare_strategies
+from pyscopa import cli
+
+
+def test_antithetic_deal_swaps_the_hands_of_every_round():
+    order = list(range(40))
+    Random(0).shuffle(order)
+    mirrored = antithetic_deal(order)
+
+    assert sorted(mirrored) == sorted(order)
+    assert mirrored[:BOARD_CARDS] == order[:BOARD_CARDS]
+    for start in range(BOARD_CARDS, len(order), 2 * HAND_CARDS):
+        assert mirrored[start:start + HAND_CARDS] == order[start + HAND_CARDS:start + 2 * HAND_CARDS]
+        assert mirrored[start + HAND_CARDS:start + 2 * HAND_CARDS] == order[start:start + HAND_CARDS]
+    assert antithetic_deal(mirrored) == order
+
+
+@pytest.mark.parametrize('strata', list(STRATA))
+def test_stratum_probabilities_sum_to_one(strata):
+    probabilities_of, _ = STRATA[strata]
+    assert math.fsum(probabilities_of().values()) == pytest.approx(1)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_confidence_interval_contains_the_edge(method):
+    result = compare_strategies('safe_discard', 'random', units=20, seed=1, method=method)
+    assert result['ci_low'] <= result['edge'] <= result['ci_high']
+    assert result['std_error'] > 0
+    assert result['games'] == result['units'] * (4 if method == 'antithetic' else 2)
+
+
+def test_crn_of_a_policy_against_itself_has_no_edge():
+    # both seats play the very same game, so every unit has an edge of exactly 0
+    result = compare_strategies('random', 'random', units=20, seed=2, method='crn')
+    assert result['edge'] == 0
+    assert result['std_error'] == 0
+    assert result['ci_low'] == result['ci_high'] == 0
+    assert result['variance_reduction'] == math.inf
+
+
+def test_tournament_rejects_unknown_methods(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(['tournament', '--method', 'crm'])
+    assert "invalid choice: 'crm'" in capsys.readouterr().err
+    assert cli.TOURNAMENT_METHODS == METHODS